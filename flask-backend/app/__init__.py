@@ -4,18 +4,62 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 
+from app import migrations
+from app.compression import compressor
 from app.config import Config
+from app.json_provider import json_provider_class
+from app.log_buffer import reading_log_buffer
+from app.metrics import metrics
 from app.models import db
+from app.passwords import password_hasher
+from app.ranks import frequency_index
+from app.search import search_backend
+from app.storage import storage
+from app.text_codec import content_codec
+from app.translate_client import translate_client
+from app.translation_cache import translation_cache
+from app.user_cache import user_cache
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.update(config_overrides or {})
+    app.json = json_provider_class(app)(app)
 
+    content_codec.init_app(app)
     db.init_app(app)
     with app.app_context():
-        db.create_all()
+        storage.init_app(app)
+        if app.config["AUTO_MIGRATE"]:
+            migrations.upgrade(log=app.logger.info)
+        elif app.config["SCHEMA_CHECK"]:
+            migrations.check()
+        search_backend.init_app(app)
+        metrics.init_app(app)
+        # a pre-forking server may boot the app once and fork it, workers
+        # must not inherit connections opened above (an in-memory SQLite
+        # database only lives as long as its connection, keep that one)
+        if db.engine.url.database not in (None, "", ":memory:"):
+            db.engine.dispose()
 
-    JWTManager(app)
+    jwt = JWTManager(app)
+    user_cache.init_app(app)
+
+    @jwt.user_lookup_loader
+    def load_user(_jwt_header, jwt_data):
+        return user_cache.load(jwt_data["sub"])
+
+    @jwt.user_lookup_error_loader
+    def user_not_found(_jwt_header, _jwt_data):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    translation_cache.init_app(app)
+    translate_client.init_app(app)
+    frequency_index.init_app(app)
+    reading_log_buffer.init_app(app)
+    password_hasher.init_app(app)
+
+    compressor.init_app(app)
 
     frontend_origin = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
     CORS(
@@ -34,6 +78,17 @@ def create_app():
     app.register_blueprint(word_bank)
     app.register_blueprint(dev)
 
+    from app.commands import (
+        backfill_text_stats, backfill_word_ranks, build_word_index, import_articles,
+        rebuild_reading_stats, rebuild_search_index, recompress_texts)
+    app.cli.add_command(backfill_text_stats)
+    app.cli.add_command(build_word_index)
+    app.cli.add_command(backfill_word_ranks)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(rebuild_reading_stats)
+    app.cli.add_command(import_articles)
+    app.cli.add_command(recompress_texts)
+
     @app.get("/health")
     def health():
         return {"ok": True}
@@ -43,3 +98,15 @@ def create_app():
         return jsonify({"message": "API is running!"}), 200
 
     return app
+
+def preload(app):
+    """
+    Does the work create_app() leaves for first use, for a master process
+    that's about to fork workers (see wsgi.py). Forked workers share what's
+    loaded here instead of each loading it on its first request.
+    """
+    import requests  # noqa: F401, the translate client's HTTP stack
+
+    # first lookup reads / maps the word frequency list
+    frequency_index.rank("the")
+    app.logger.info("preloaded for forking")
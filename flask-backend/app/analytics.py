@@ -0,0 +1,97 @@
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Readability stats for Text rows. Everything here is plain functions on
+# strings so it can be shipped to worker processes.
+
+WORD_RE = re.compile(r"[A-Za-z]+(?:['’-][A-Za-z]+)*")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"'”’)\]]*\s+|\n{2,}")
+
+
+def content_hash(content):
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def tokenize(content):
+    return WORD_RE.findall(content or "")
+
+
+def split_sentences(content):
+    parts = SENTENCE_END_RE.split((content or "").strip())
+    return [p for p in parts if p and WORD_RE.search(p)]
+
+
+def make_excerpt(content, length=140):
+    content = content or ""
+    return content[:length] + ("…" if len(content) > length else "")
+
+
+def _difficulty(average_sentence_length, average_word_length, unique_ratio):
+    """
+    Rough 0..1 score, blends sentence length, word length and vocabulary
+    variety, each clamped to a range typical for learner texts.
+    """
+    def scale(value, low, high):
+        return min(1.0, max(0.0, (value - low) / (high - low)))
+
+    score = (
+        0.4 * scale(average_sentence_length, 8, 30)
+        + 0.4 * scale(average_word_length, 3.5, 6.0)
+        + 0.2 * scale(unique_ratio, 0.3, 0.8)
+    )
+    return round(score, 3)
+
+
+def text_stats(content):
+    """Computes the readability columns of Text for one article body."""
+    words = tokenize(content)
+    sentences = split_sentences(content)
+
+    total_words = len(words)
+    if not total_words:
+        return {
+            "total_words": 0,
+            "unique_words": 0,
+            "average_sentence_length": 0.0,
+            "average_word_length": 0.0,
+            "difficulty": 0.0,
+            "excerpt": make_excerpt(content),
+            "content_hash": content_hash(content),
+        }
+
+    unique_words = len({w.lower() for w in words})
+    average_sentence_length = total_words / max(1, len(sentences))
+    average_word_length = sum(len(w) for w in words) / total_words
+
+    return {
+        "total_words": total_words,
+        "unique_words": unique_words,
+        "average_sentence_length": round(average_sentence_length, 2),
+        "average_word_length": round(average_word_length, 2),
+        "difficulty": _difficulty(
+            average_sentence_length, average_word_length, unique_words / total_words
+        ),
+        "excerpt": make_excerpt(content),
+        "content_hash": content_hash(content),
+    }
+
+
+def stats_for_row(row):
+    text_id, content = row
+    return text_id, text_stats(content)
+
+
+def compute_many(rows, pool=None, chunksize=16):
+    """
+    rows: list of (text_id, content).
+    Yields (text_id, stats), on the given process pool if there is one.
+    """
+    if pool is None:
+        yield from map(stats_for_row, rows)
+        return
+    yield from pool.map(stats_for_row, rows, chunksize=chunksize)
+
+
+def make_pool(workers=None):
+    return ProcessPoolExecutor(max_workers=workers)
@@ -0,0 +1,214 @@
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from app.analytics import compute_many, content_hash, make_pool
+from app.importer import (
+    TagResolver, chunked, guess_format, insert_chunk, normalize, open_source, read_records)
+from app.models import db, Text, User, Word
+from app.ranks import build_index, frequency_index, word_ranks
+from app.reading import rebuild_aggregates
+from app.search import search_backend
+
+
+@click.command("backfill-text-stats")
+@click.option("--chunk-size", default=500, show_default=True, help="Rows per transaction.")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: all cores).")
+@click.option("--force", is_flag=True, help="Recompute even if the content hash is unchanged.")
+@with_appcontext
+def backfill_text_stats(chunk_size, workers, force):
+    """Fills the readability columns of existing Text rows."""
+    started = time.perf_counter()
+    scanned = 0
+    updated = 0
+    last_id = 0
+
+    with make_pool(workers) as pool:
+        while True:
+            rows = db.session.execute(
+                db.select(Text.id, Text.content, Text.content_hash, Text.excerpt)
+                .where(Text.id > last_id)
+                .order_by(Text.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            stale = [
+                (row.id, row.content)
+                for row in rows
+                if force or row.excerpt is None or row.content_hash != content_hash(row.content)
+            ]
+            if stale:
+                # ORM bulk UPDATE by primary key, one executemany per chunk
+                db.session.execute(
+                    db.update(Text),
+                    [{"id": text_id, **stats} for text_id, stats in compute_many(stale, pool)],
+                )
+                db.session.commit()
+                updated += len(stale)
+
+            click.echo(f"scanned {scanned}, updated {updated}")
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"done: {updated}/{scanned} texts updated in {elapsed:.1f}s")
+
+
+@click.command("build-word-index")
+@with_appcontext
+def build_word_index():
+    """Compiles WORD_FREQ_PATH into the mmap-able .idx file next to it."""
+    src = frequency_index.path
+    if not src:
+        raise click.ClickException("WORD_FREQ_PATH is not set")
+
+    count = build_index(src, frequency_index.index_path)
+    click.echo(f"indexed {count} words into {frequency_index.index_path}")
+
+
+@click.command("backfill-word-ranks")
+@click.option("--chunk-size", default=1000, show_default=True, help="Rows per transaction.")
+@click.option("--all", "all_rows", is_flag=True, help="Recompute rows that already have ranks.")
+@with_appcontext
+def backfill_word_ranks(chunk_size, all_rows):
+    """Fills Word.lemma_rank / word_rank from the frequency list."""
+    started = time.perf_counter()
+    scanned = 0
+    updated = 0
+    last_id = 0
+
+    while True:
+        query = db.select(Word.id, Word.lemma, Word.lemma_rank, Word.word_rank).where(Word.id > last_id)
+        if not all_rows:
+            query = query.where(db.or_(Word.lemma_rank == 0, Word.word_rank == 0))
+
+        rows = db.session.execute(query.order_by(Word.id).limit(chunk_size)).all()
+        if not rows:
+            break
+
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        changes = []
+        for row in rows:
+            word_rank, lemma_rank = word_ranks(row.lemma)
+            if (word_rank, lemma_rank) != (row.word_rank, row.lemma_rank):
+                changes.append({"id": row.id, "word_rank": word_rank, "lemma_rank": lemma_rank})
+
+        if changes:
+            db.session.execute(db.update(Word), changes)
+            db.session.commit()
+            updated += len(changes)
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"done: {updated}/{scanned} words updated in {elapsed:.1f}s")
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Reindexes every Text for full-text search."""
+    if not search_backend.enabled:
+        raise click.ClickException("full-text search is not available on this database")
+
+    with db.engine.begin() as conn:
+        count = search_backend.rebuild(conn)
+    click.echo(f"indexed {count} texts")
+
+
+@click.command("rebuild-reading-stats")
+@with_appcontext
+def rebuild_reading_stats():
+    """Recomputes the per-user and per-day reading totals from Log."""
+    started = time.perf_counter()
+    rebuild_aggregates()
+    db.session.commit()
+    click.echo(f"reading stats rebuilt in {time.perf_counter() - started:.1f}s")
+
+
+@click.command("import-articles")
+@click.argument("path")
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "csv"]), default=None,
+              help="Input format (default: from the file extension).")
+@click.option("--chunk-size", default=1000, show_default=True, help="Rows per transaction.")
+@click.option("--workers", default=None, type=int, help="Worker processes for text stats (default: all cores).")
+@click.option("--user", "user_name", default=None, help="Also add the articles to this user's library.")
+@click.option("--max-errors", default=100, show_default=True, help="Give up after this many bad records.")
+@with_appcontext
+def import_articles(path, fmt, chunk_size, workers, user_name, max_errors):
+    """Streams articles from a JSONL or CSV file (or - for stdin) into Text."""
+    fmt = fmt or guess_format(path)
+
+    user_id = None
+    if user_name:
+        user_id = db.session.execute(
+            db.select(User.id).where(User.name == user_name)
+        ).scalar()
+        if user_id is None:
+            raise click.ClickException(f"no user named {user_name!r}")
+
+    started = time.perf_counter()
+    imported = 0
+    errors = 0
+
+    def valid_records(records):
+        nonlocal errors
+        for line_no, record in records:
+            try:
+                yield normalize(record)
+            except ValueError as e:
+                errors += 1
+                click.echo(f"line {line_no}: skipped, {e}", err=True)
+                if errors >= max_errors:
+                    raise click.ClickException(f"too many bad records ({errors}), stopping")
+
+    tags = TagResolver()
+    with open_source(path) as stream, make_pool(workers) as pool:
+        for chunk in chunked(valid_records(read_records(stream, fmt)), chunk_size):
+            insert_chunk(chunk, tags, user_id=user_id, pool=pool)
+            db.session.commit()
+            imported += len(chunk)
+
+            elapsed = time.perf_counter() - started
+            click.echo(f"imported {imported} ({imported / elapsed:.0f}/s)")
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"done: {imported} texts imported, {errors} skipped, "
+        f"in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):.0f}/s)"
+    )
+
+
+@click.command("recompress-texts")
+@click.option("--chunk-size", default=500, show_default=True, help="Rows per transaction.")
+@with_appcontext
+def recompress_texts(chunk_size):
+    """Rewrites every Text body with the current TEXT_COMPRESS_* settings."""
+    started = time.perf_counter()
+    total = 0
+    last_id = 0
+
+    while True:
+        rows = db.session.execute(
+            db.select(Text.id, Text.content).where(Text.id > last_id).order_by(Text.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # Core UPDATE, the body round-trips through the column type, nothing else changes
+        db.session.execute(
+            Text.__table__.update()
+            .where(Text.__table__.c.id == db.bindparam("b_id"))
+            .values(content=db.bindparam("b_content")),
+            [{"b_id": row.id, "b_content": row.content} for row in rows],
+        )
+        db.session.commit()
+        total += len(rows)
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"rewrote {total} texts in {elapsed:.1f}s")
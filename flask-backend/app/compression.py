@@ -0,0 +1,73 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is offered without it
+    brotli = None
+
+# Response compression, negotiated from Accept-Encoding.
+# Only buffered responses of a compressible type above min_size are
+# touched, everything else (streams, 304s, tiny payloads) goes out as is.
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class Compressor:
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+
+    @property
+    def encodings(self):
+        return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    def init_app(self, app):
+        self.enabled = app.config["COMPRESS_RESPONSES"]
+        self.min_size = app.config["COMPRESS_MIN_SIZE"]
+        self.gzip_level = app.config["COMPRESS_GZIP_LEVEL"]
+        self.brotli_quality = app.config["COMPRESS_BROTLI_QUALITY"]
+        if self.enabled:
+            app.after_request(self.after_request)
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def after_request(self, response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if not encoding:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+
+        # same entity, different bytes: the validator can only be weak now
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+
+compressor = Compressor()
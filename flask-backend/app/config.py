@@ -1,8 +1,42 @@
 import os
 from datetime import timedelta
-from dotenv import load_dotenv
 
-load_dotenv()
+# production gets its environment from the process manager, don't go
+# looking for (or pick up a stale) .env on every worker boot
+if os.getenv("APP_ENV") != "production":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def storage_profile(uri):
+    """
+    DB_PROFILE picks the engine tuning: "sqlite", "postgres", "none",
+    or "auto" (the default) to go by the database URL.
+    """
+    profile = os.getenv("DB_PROFILE", "auto").lower()
+    if profile == "auto":
+        if uri.startswith("sqlite"):
+            return "sqlite"
+        if uri.startswith("postgres"):
+            return "postgres"
+        return "none"
+    return profile
+
+def engine_options(profile):
+    if profile == "postgres":
+        return {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # drop connections the server or a proxy has closed before using them
+            "pool_pre_ping": True,
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        }
+    if profile == "sqlite":
+        # pysqlite's own lock wait, the busy_timeout pragma sets the same thing
+        return {"connect_args": {"timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")) / 1000}}
+    return {}
 
 class Config:
     """
@@ -14,12 +48,92 @@ class Config:
         raise RuntimeError("SECRET_KEY is missing. Add it to .env or export it in your shell.")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///site.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_PROFILE = storage_profile(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DB_PROFILE)
+    # run on every new connection under the sqlite profile, see app/storage.py
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        # negative = KiB
+        "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "20000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+        "temp_store": "MEMORY",
+    }
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+    # "production" turns off automatic migrations, see app/migrations.py
+    APP_ENV = os.getenv("APP_ENV", "development")
+    AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", str(APP_ENV != "production")).lower() == "true"
+    # no DDL at boot, the search index is only checked for
+    # (`python -m tools.migrate upgrade` creates it at deploy)
+    FAST_START = os.getenv("FAST_START", str(APP_ENV == "production")).lower() == "true"
+    # without AUTO_MIGRATE, refuse to start on a database that's behind
+    SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "True").lower() == "true"
+
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)
     JWT_TOKEN_LOCATION = ["headers", "cookies"]
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_DAYS", "14")))
 
     JWT_COOKIE_SAMESITE = os.getenv("JWT_COOKIE_SAMESITE", "Lax")
     JWT_COOKIE_SECURE = os.getenv("JWT_COOKIE_SECURE", "False").lower() == "true"
-    JWT_COOKIE_CSRF_PROTECT = os.getenv("JWT_COOKIE_CSRF_PROTECT", "True").lower() == "true"
\ No newline at end of file
+    JWT_COOKIE_CSRF_PROTECT = os.getenv("JWT_COOKIE_CSRF_PROTECT", "True").lower() == "true"
+
+    TRANSLATE_BATCH_MAX = int(os.getenv("TRANSLATE_BATCH_MAX", "200"))
+    TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", "8"))
+
+    TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+    TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", "3600"))
+    TRANSLATION_CACHE_NEGATIVE_TTL = int(os.getenv("TRANSLATION_CACHE_NEGATIVE_TTL", "60"))
+
+    TRANSLATE_URL = os.getenv("TRANSLATE_URL", "https://translate.googleapis.com/translate_a/single")
+    TRANSLATE_POOL_SIZE = int(os.getenv("TRANSLATE_POOL_SIZE", "20"))
+    TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "2"))
+    TRANSLATE_DEADLINE = float(os.getenv("TRANSLATE_DEADLINE", "5"))
+    TRANSLATE_MAX_ATTEMPTS = int(os.getenv("TRANSLATE_MAX_ATTEMPTS", "3"))
+    TRANSLATE_RETRY_RATIO = float(os.getenv("TRANSLATE_RETRY_RATIO", "0.2"))
+    TRANSLATE_BREAKER_THRESHOLD = int(os.getenv("TRANSLATE_BREAKER_THRESHOLD", "5"))
+    TRANSLATE_BREAKER_RESET = float(os.getenv("TRANSLATE_BREAKER_RESET", "30"))
+
+    # one word per line, most frequent first, see app/ranks.py
+    WORD_FREQ_PATH = os.getenv("WORD_FREQ_PATH", os.path.join(BASE_DIR, "data", "word_freq.txt"))
+
+    # buffer reading-time logs and write them in batches, see app/log_buffer.py
+    READING_LOG_WRITE_BEHIND = os.getenv("READING_LOG_WRITE_BEHIND", "False").lower() == "true"
+    READING_LOG_FLUSH_SIZE = int(os.getenv("READING_LOG_FLUSH_SIZE", "500"))
+    READING_LOG_FLUSH_INTERVAL = float(os.getenv("READING_LOG_FLUSH_INTERVAL", "2"))
+    READING_LOG_MAX_PENDING = int(os.getenv("READING_LOG_MAX_PENDING", "50000"))
+    READING_BULK_MAX = int(os.getenv("READING_BULK_MAX", "500"))
+
+    # user rows behind JWTs, kept briefly across requests, see app/user_cache.py
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "10"))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+    # werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:600000";
+    # stored hashes made with other parameters are redone on login
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # processes for hashing, 0 hashes on the request thread
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # queued + running hashes per process before answering 503, 0 = 4 per worker
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "0"))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+    # store article bodies of at least this many bytes zlib-compressed, 0 = never
+    TEXT_COMPRESS_MIN_BYTES = int(os.getenv("TEXT_COMPRESS_MIN_BYTES", "0"))
+    TEXT_COMPRESS_LEVEL = int(os.getenv("TEXT_COMPRESS_LEVEL", "6"))
+
+    # orjson for jsonify when it's installed, see app/json_provider.py
+    JSON_FAST = os.getenv("JSON_FAST", "True").lower() == "true"
+
+    # gzip / brotli (if installed) for responses of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "True").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+    # request / SQL / upstream metrics on /metrics, see app/metrics.py
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+    # if set, /metrics wants "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+    # one statement run this many times in a request is logged as a likely N+1
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "10"))
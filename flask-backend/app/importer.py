@@ -0,0 +1,171 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from datetime import datetime, timezone
+from itertools import islice
+
+from app.analytics import compute_many
+from app.models import db, Tag, Text, text_tag_association, user_text
+from app.search import search_backend
+
+# Bulk article import for `flask import-articles`.
+#
+# Records are read one at a time and written in chunks with Core
+# executemany inserts, so memory stays flat however big the file is.
+# A record is a JSON object (one per line) or a CSV row with:
+#   content (required), title, url, authors, date (ISO 8601),
+#   tags (a list, or a string split on commas / semicolons / pipes)
+
+TEXT_FIELDS = ("title", "url", "authors")
+TAG_SEPARATORS = (";", "|")
+
+
+def open_source(path):
+    """Text stream for a path, '-' is stdin, .gz files are decompressed on the fly."""
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(stream, fmt):
+    """
+    Yields (line number, record) pairs, a record is a dict for CSV
+    and the raw line for JSONL (decoded in normalize, so one bad line
+    doesn't stop the whole file).
+    """
+    if fmt == "csv":
+        # article bodies can be long
+        csv.field_size_limit(2**31 - 1)
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def parse_tags(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        for sep in TAG_SEPARATORS:
+            value = value.replace(sep, ",")
+        value = value.split(",")
+    names = []
+    for name in value:
+        name = str(name).strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def parse_date(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    # stored naive UTC like everything else
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def normalize(record):
+    """Turns one input record into (Text column values, tag names), or raises ValueError."""
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    content = record.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("missing content")
+
+    row = {"content": content}
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        row[field] = str(value).strip() if value not in (None, "") else None
+    row["date"] = parse_date(record.get("date"))
+    return row, parse_tags(record.get("tags"))
+
+
+class TagResolver:
+    """Tag name -> id, loaded once and extended as new names come in."""
+
+    def __init__(self):
+        self.ids = {}
+        for tag_id, name in db.session.execute(db.select(Tag.id, Tag.name).order_by(Tag.id)):
+            self.ids.setdefault(name, tag_id)
+
+    def resolve(self, names):
+        missing = sorted({n for n in names if n not in self.ids})
+        if missing:
+            db.session.execute(Tag.__table__.insert(), [{"name": n} for n in missing])
+            rows = db.session.execute(
+                db.select(Tag.id, Tag.name).where(Tag.name.in_(missing)).order_by(Tag.id)
+            )
+            for tag_id, name in rows:
+                self.ids.setdefault(name, tag_id)
+        return [self.ids[n] for n in names]
+
+
+def insert_chunk(records, tags, user_id=None, pool=None):
+    """
+    Writes one chunk of normalized records in the current transaction.
+    records: list of (Text values, tag names). Returns the new text ids.
+    """
+    now = datetime.utcnow()
+    rows = []
+    stats = compute_many([(i, values["content"]) for i, (values, _) in enumerate(records)], pool)
+    for (values, _), (_, text_stats) in zip(records, stats):
+        rows.append({**values, "date": values["date"] or now, **text_stats})
+
+    # executemany with RETURNING, ids come back in row order
+    text_ids = db.session.execute(
+        Text.__table__.insert().returning(Text.__table__.c.id, sort_by_parameter_order=True),
+        rows,
+    ).scalars().all()
+
+    all_names = {n for _, names in records for n in names}
+    tag_ids = dict(zip(sorted(all_names), tags.resolve(sorted(all_names))))
+
+    links = [
+        {"text_id": text_id, "tag_id": tag_ids[name]}
+        for text_id, (_, names) in zip(text_ids, records)
+        for name in names
+    ]
+    if links:
+        db.session.execute(text_tag_association.insert(), links)
+
+    if user_id is not None:
+        db.session.execute(
+            user_text.insert(), [{"user_id": user_id, "text_id": tid} for tid in text_ids]
+        )
+
+    # Core inserts skip the ORM flush hook, index them here
+    search_backend.index_texts(db.session.connection(), [
+        (text_id, row["title"], row["content"], " ".join(names))
+        for text_id, row, (_, names) in zip(text_ids, rows, records)
+    ])
+
+    return text_ids
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,54 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib json provider is used instead
+    orjson = None
+
+# jsonify / request.json through orjson when it's installed.
+#
+# Output matches the default provider where it matters: keys sorted,
+# datetimes handed to the default provider's `default` (so they're still
+# HTTP dates), non-string dict keys allowed. Anything orjson refuses, like
+# ints over 64 bits, falls back to the stdlib encoder. Non-ASCII is written
+# as utf-8 rather than \u escapes.
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    @property
+    def options(self):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dump_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # pretty-printing for debug mode stays with the stdlib
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dump_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+    def _dump_bytes(self, obj):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self.options)
+        except TypeError:
+            return super().dumps(obj).encode("utf-8")
+
+
+def json_provider_class(app):
+    """The provider class to use for this app's config."""
+    if app.config["JSON_FAST"] and orjson is not None:
+        return OrjsonProvider
+    return DefaultJSONProvider
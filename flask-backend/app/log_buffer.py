@@ -0,0 +1,111 @@
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from app.models import db, Text
+from app.reading import record_reading
+
+
+class ReadingLogBuffer:
+    """
+    Write-behind buffer for reading-time logs.
+    Requests validate and enqueue, a background thread writes the queue
+    in one transaction whenever it reaches flush_size or every
+    flush_interval seconds, and whatever is left is written at exit.
+    When disabled, add() writes straight through in the caller's session.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.flush_size = 500
+        self.flush_interval = 2.0
+        # don't grow without bound if the database is down
+        self.max_pending = 50_000
+
+        self._items = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config["READING_LOG_WRITE_BEHIND"]
+        self.flush_size = app.config["READING_LOG_FLUSH_SIZE"]
+        self.flush_interval = app.config["READING_LOG_FLUSH_INTERVAL"]
+        self.max_pending = max(self.flush_size, app.config["READING_LOG_MAX_PENDING"])
+
+        if self.enabled:
+            atexit.register(self.flush)
+
+    def add(self, entries):
+        """entries: dicts with user_id, text_id, elapsed_time_seconds (already validated)."""
+        now = datetime.utcnow()
+        entries = [{**e, "date": e.get("date") or now} for e in entries]
+
+        if not self.enabled:
+            record_reading(entries)
+            db.session.commit()
+            return
+
+        self._ensure_thread()
+        with self._lock:
+            self._items.extend(entries)
+            full = len(self._items) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._items)
+
+    def flush(self):
+        with self._lock:
+            batch, self._items = self._items, []
+        if not batch:
+            return 0
+
+        with self.app.app_context():
+            try:
+                # the text may have been deleted while its logs were queued
+                live = set(db.session.execute(
+                    db.select(Text.id).where(Text.id.in_({e["text_id"] for e in batch}))
+                ).scalars())
+                record_reading([e for e in batch if e["text_id"] in live])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("failed to flush %d reading logs", len(batch))
+                with self._lock:
+                    # put them back for the next try, oldest first
+                    self._items = (batch + self._items)[-self.max_pending:]
+                return 0
+            finally:
+                db.session.remove()
+
+        return len(batch)
+
+    def _ensure_thread(self):
+        # the thread doesn't survive a fork, start one per process
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name="reading-log-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+reading_log_buffer = ReadingLogBuffer()
@@ -0,0 +1,216 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as StatementCounter
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from app.models import db
+from app.translation_cache import translation_cache
+from app.user_cache import user_cache
+
+# Request, SQL and upstream metrics in the Prometheus text format.
+#
+# With METRICS_ENABLED off, init_app registers nothing: no request hooks,
+# no engine listeners and no /metrics route. The translate client still
+# calls observe_upstream(), which then returns straight away.
+# Numbers are per process, under several workers each one reports its own.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {_number(total)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.token = None
+        self.n_plus_one_threshold = 10
+        self.logger = None
+
+        self.request_seconds = Histogram(
+            "enlingo_http_request_duration_seconds", "Time spent handling a request.",
+            LATENCY_BUCKETS, ("method", "route", "status"),
+        )
+        self.request_statements = Histogram(
+            "enlingo_db_statements_per_request", "SQL statements executed per request.",
+            STATEMENT_BUCKETS, ("method", "route"),
+        )
+        self.request_sql_seconds = Histogram(
+            "enlingo_db_seconds_per_request", "Time spent in SQL statements per request.",
+            LATENCY_BUCKETS, ("method", "route"),
+        )
+        self.n_plus_one = Counter(
+            "enlingo_db_n_plus_one_total",
+            "Requests that ran one statement at least METRICS_N_PLUS_ONE_THRESHOLD times.",
+            ("method", "route"),
+        )
+        self.upstream_seconds = Histogram(
+            "enlingo_upstream_request_duration_seconds", "Time per call to the translate upstream.",
+            LATENCY_BUCKETS, ("outcome",),
+        )
+        self.upstream_rejected = Counter(
+            "enlingo_upstream_breaker_rejections_total", "Translations not attempted, breaker open.",
+        )
+
+    def init_app(self, app):
+        """Call inside an app context."""
+        self.enabled = app.config["METRICS_ENABLED"]
+        self.token = app.config["METRICS_TOKEN"]
+        self.n_plus_one_threshold = app.config["METRICS_N_PLUS_ONE_THRESHOLD"]
+        self.logger = app.logger
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        event.listen(db.engine, "before_cursor_execute", self._before_statement)
+        event.listen(db.engine, "after_cursor_execute", self._after_statement)
+        app.add_url_rule("/metrics", "metrics", self.view)
+
+    # --- per request ---
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_seconds = 0.0
+        g.metrics_statements = StatementCounter()
+
+    def _before_statement(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def _after_statement(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        # statements outside a request (CLI, background flushes) aren't attributed
+        if has_request_context() and "metrics_statements" in g:
+            g.metrics_sql_seconds += time.perf_counter() - started
+            g.metrics_statements[statement] += 1
+
+    def _after_request(self, response):
+        if request.endpoint == "metrics" or "metrics_started" not in g:
+            return response
+
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        method = request.method
+        self.request_seconds.observe(time.perf_counter() - g.metrics_started, method, route,
+                                     str(response.status_code))
+        self.request_statements.observe(sum(g.metrics_statements.values()), method, route)
+        self.request_sql_seconds.observe(g.metrics_sql_seconds, method, route)
+
+        if g.metrics_statements:
+            statement, repeats = g.metrics_statements.most_common(1)[0]
+            # the same statement over and over with different parameters, usually a lazy load in a loop
+            if repeats >= self.n_plus_one_threshold:
+                self.n_plus_one.inc(method, route)
+                self.logger.warning("likely N+1 on %s %s: %d x %s", method, route, repeats,
+                                    " ".join(statement.split())[:200])
+        return response
+
+    # --- translate upstream ---
+
+    def observe_upstream(self, seconds, outcome):
+        """outcome: the HTTP status, or "timeout" / "connection_error"."""
+        if self.enabled:
+            self.upstream_seconds.observe(seconds, str(outcome))
+
+    def breaker_rejected(self):
+        if self.enabled:
+            self.upstream_rejected.inc()
+
+    # --- exposition ---
+
+    def render(self):
+        lines = []
+        for metric in (self.request_seconds, self.request_statements, self.request_sql_seconds,
+                       self.n_plus_one, self.upstream_seconds, self.upstream_rejected):
+            lines += metric.render()
+
+        caches = {"translation": translation_cache.stats(), "user": user_cache.stats()}
+        for kind, help in (("hits", "Cache lookups answered from memory."),
+                           ("misses", "Cache lookups that went to the database.")):
+            lines += [f"# HELP enlingo_cache_{kind}_total {help}", f"# TYPE enlingo_cache_{kind}_total counter"]
+            lines += [f'enlingo_cache_{kind}_total{{cache="{name}"}} {stats[kind]}' for name, stats in caches.items()]
+        lines += ["# HELP enlingo_cache_hit_ratio Share of cache lookups that were hits.",
+                  "# TYPE enlingo_cache_hit_ratio gauge"]
+        for name, stats in caches.items():
+            lookups = stats["hits"] + stats["misses"]
+            lines.append(f'enlingo_cache_hit_ratio{{cache="{name}"}} {_number(stats["hits"] / lookups if lookups else 0.0)}')
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        if self.token:
+            given = request.headers.get("Authorization", "").encode()
+            if not hmac.compare_digest(given, f"Bearer {self.token}".encode()):
+                return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+metrics = Metrics()
@@ -0,0 +1,261 @@
+"""
+Versioned schema migrations.
+
+    python -m tools.migrate status
+    python -m tools.migrate upgrade
+
+The applied versions are recorded in `schema_version`. A new database is
+built straight from the models and stamped with the latest version, an
+existing one runs every migration it hasn't seen yet, each in its own
+transaction. Migrations check what's already there before changing it,
+so a database that got part of the way (e.g. tables made by create_all
+before this existed) upgrades cleanly.
+
+In development create_app upgrades on start (AUTO_MIGRATE). In production
+it only checks, and refuses to start on a database that's behind.
+"""
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, text as sql
+
+from app.models import db
+from app.reading import rebuild_aggregates
+from app.search import search_backend
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+# --- helpers ---
+
+def _columns(conn, table):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, name, ddl_suffix=""):
+    """Adds a model column to an existing table if it isn't there yet."""
+    if name in _columns(conn, table):
+        return
+    column_type = db.metadata.tables[table].c[name].type.compile(dialect=conn.dialect)
+    preparer = conn.dialect.identifier_preparer
+    conn.execute(sql(
+        f"ALTER TABLE {preparer.quote(table)} ADD COLUMN {preparer.quote(name)} {column_type} {ddl_suffix}"
+    ))
+
+
+def create_index(conn, table, name):
+    """Creates a model index if it isn't there yet, replacing a non-unique one of the same name."""
+    index = next(i for i in db.metadata.tables[table].indexes if i.name == name)
+    existing = {i["name"]: i for i in inspect(conn).get_indexes(table)}
+    if name in existing:
+        if bool(existing[name]["unique"]) == bool(index.unique):
+            return
+        conn.execute(sql(f"DROP INDEX {conn.dialect.identifier_preparer.quote(name)}"))
+    index.create(conn)
+
+
+def merge_duplicates(conn, table, column, references):
+    """
+    Collapses rows of `table` sharing the same `column` value into the one
+    with the lowest id, repointing `references` first.
+    references: (table, fk column, extra key column or None, counter column or None).
+    With an extra key the referencing table has a (key, fk) primary key, rows that
+    would collide are merged, adding up the counter if there is one.
+    """
+    dupes = conn.execute(sql(
+        f"SELECT {column}, MIN(id) FROM {table} GROUP BY {column} HAVING COUNT(*) > 1"
+    )).all()
+    for value, keep in dupes:
+        others = conn.execute(
+            sql(f"SELECT id FROM {table} WHERE {column} = :value AND id != :keep"),
+            {"value": value, "keep": keep},
+        ).scalars().all()
+
+        for other in others:
+            params = {"keep": keep, "other": other}
+            for ref_table, fk, key, counter in references:
+                if key is None:
+                    conn.execute(sql(f"UPDATE {ref_table} SET {fk} = :keep WHERE {fk} = :other"), params)
+                    continue
+                if counter:
+                    conn.execute(sql(f"""
+                        UPDATE {ref_table} SET {counter} = {counter} + (
+                            SELECT o.{counter} FROM {ref_table} o
+                            WHERE o.{key} = {ref_table}.{key} AND o.{fk} = :other
+                        )
+                        WHERE {fk} = :keep AND {key} IN (
+                            SELECT {key} FROM {ref_table} WHERE {fk} = :other
+                        )
+                    """), params)
+                conn.execute(sql(f"""
+                    UPDATE {ref_table} SET {fk} = :keep
+                    WHERE {fk} = :other AND {key} NOT IN (
+                        SELECT {key} FROM {ref_table} WHERE {fk} = :keep
+                    )
+                """), params)
+                conn.execute(sql(f"DELETE FROM {ref_table} WHERE {fk} = :other"), params)
+
+        conn.execute(
+            sql(f"DELETE FROM {table} WHERE {column} = :value AND id != :keep"),
+            {"value": value, "keep": keep},
+        )
+
+
+# --- migrations ---
+
+def _reading_quiz_and_search_columns(conn):
+    """Columns and indexes added since the first release, on tables that already existed."""
+    add_column(conn, "user_word", "due_at")
+    add_column(conn, "user_word", "ease", "NOT NULL DEFAULT 2.5")
+    add_column(conn, "user_word", "interval_days", "NOT NULL DEFAULT 0")
+    add_column(conn, "text", "content_hash")
+    add_column(conn, "text", "excerpt")
+    add_column(conn, "text", "updated_at")
+    add_column(conn, "reading_stats", "last_text_id")
+    add_column(conn, "reading_stats", "last_read_at")
+
+    create_index(conn, "user_word", "ix_user_word_user_due")
+    create_index(conn, "text", "ix_text_date_id")
+    create_index(conn, "log", "ix_log_user_date")
+    create_index(conn, "quiz_answer", "ix_quiz_answer_user_word")
+
+    # reading totals used to be summed from Log on every request
+    if not conn.execute(sql("SELECT COUNT(*) FROM reading_stats")).scalar():
+        rebuild_aggregates(conn)
+
+
+def _postgres_column_types(conn):
+    """SQLite doesn't enforce these, Postgres needs the columns altered."""
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(sql('ALTER TABLE "user" ALTER COLUMN password_hash TYPE VARCHAR(255)'))
+    content_type = next(c["type"] for c in inspect(conn).get_columns("text") if c["name"] == "content")
+    if "BYTEA" not in str(content_type).upper():
+        conn.execute(sql(
+            "ALTER TABLE text ALTER COLUMN content TYPE BYTEA USING convert_to(content, 'UTF8')"
+        ))
+
+
+def _hot_path_indexes(conn):
+    """Foreign key indexes for deletes and joins, unique tag names and lemmas."""
+    create_index(conn, "log", "ix_log_text_id")
+    create_index(conn, "user_word", "ix_user_word_word_id")
+    create_index(conn, "user_text", "ix_user_text_text_id")
+    create_index(conn, "text_tag_association", "ix_text_tag_association_tag_id")
+
+    merge_duplicates(conn, "tag", "name", [
+        ("text_tag_association", "tag_id", "text_id", None),
+    ])
+    create_index(conn, "tag", "ix_tag_name")
+
+    merge_duplicates(conn, "word", "lemma", [
+        ("user_word", "word_id", "user_id", "number_of_times_seen"),
+        ("quiz_answer", "word_id", None, None),
+    ])
+    create_index(conn, "word", "ix_word_lemma")
+
+
+def _text_date_not_null(conn):
+    """Listings paginate on (date, id), a NULL date breaks the cursor and drops out of the keyset."""
+    conn.execute(sql(
+        "UPDATE text SET date = COALESCE(updated_at, :now) WHERE date IS NULL"
+    ), {"now": datetime.utcnow()})
+    # SQLite can't alter a column: new databases get NOT NULL from the model,
+    # older ones rely on the column default from here on
+    if conn.dialect.name == "postgresql":
+        conn.execute(sql("ALTER TABLE text ALTER COLUMN date SET NOT NULL"))
+
+
+# (version, description, function), append only
+MIGRATIONS = [
+    (1, "reading, quiz and search columns", _reading_quiz_and_search_columns),
+    (2, "postgres column types", _postgres_column_types),
+    (3, "hot path indexes, unique tag names and lemmas", _hot_path_indexes),
+    (4, "text dates not null", _text_date_not_null),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+# --- running them ---
+
+def current_version(conn):
+    """Applied version, None for an empty database, 0 for one from before migrations."""
+    tables = set(inspect(conn).get_table_names())
+    if "schema_version" in tables:
+        return conn.execute(sql("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    return 0 if "user" in tables else None
+
+
+def pending(conn):
+    version = current_version(conn)
+    if version is None:
+        return list(MIGRATIONS)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def _record(conn, migrations):
+    if migrations:
+        conn.execute(schema_version.insert(), [
+            {"version": v, "description": d, "applied_at": datetime.utcnow()} for v, d, _ in migrations
+        ])
+
+
+def _lock(conn):
+    # one process migrates at a time, the others wait and then find nothing to do
+    if conn.dialect.name == "postgresql":
+        conn.execute(sql("SELECT pg_advisory_xact_lock(hashtext('enlingo schema'))"))
+
+
+def upgrade(log=print):
+    """Brings the database to HEAD. Returns the list of versions applied."""
+    applied = _migrate(log)
+    # the full-text index isn't part of the models, see app/search.py
+    search_backend.ensure_index()
+    return applied
+
+
+def _migrate(log):
+    with db.engine.begin() as conn:
+        _lock(conn)
+        fresh = current_version(conn) is None
+        schema_version.create(conn, checkfirst=True)
+        # new tables (and every table, on a new database) come straight from the models
+        db.metadata.create_all(conn)
+        if fresh:
+            _record(conn, MIGRATIONS)
+            log(f"created schema at version {HEAD}")
+            return [m[0] for m in MIGRATIONS]
+        todo = pending(conn)
+
+    applied = []
+    for version, description, migrate in todo:
+        with db.engine.begin() as conn:
+            _lock(conn)
+            if current_version(conn) >= version:
+                continue
+            migrate(conn)
+            _record(conn, [(version, description, migrate)])
+        log(f"applied {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def check():
+    """Raises SchemaOutOfDate if the database isn't at HEAD."""
+    with db.engine.connect() as conn:
+        version = current_version(conn)
+    if version is None or version < HEAD:
+        raise SchemaOutOfDate(
+            f"database schema is at version {version or 0}, this code needs {HEAD}; "
+            "run `python -m tools.migrate upgrade`"
+        )
@@ -1,44 +1,122 @@
 from datetime import datetime
 
+from importlib import import_module
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import deferred
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from app.analytics import content_hash, text_stats
+from app.ranks import word_ranks
+from app.text_codec import CompressedText
+
 db = SQLAlchemy()
 
+def dialect_insert(dialect, table):
+    """
+    The dialect's own INSERT construct (with ON CONFLICT), imported on first
+    use so a worker doesn't load the postgres dialect to run on SQLite.
+    """
+    return import_module(f"sqlalchemy.dialects.{dialect}").insert(table)
+
+def insert_ignore(table, rows):
+    """
+    Inserts rows, silently skipping any that hit a unique constraint.
+    Uses INSERT ... ON CONFLICT DO NOTHING where the dialect has it,
+    otherwise falls back to one savepoint per row.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        db.session.execute(dialect_insert(dialect, table).on_conflict_do_nothing(), rows)
+        return
+
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), row)
+        except IntegrityError:
+            pass
+
+def insert_or_increment(table, rows, keys, counters):
+    """
+    Upserts rows that carry increments: a new key is inserted as-is,
+    an existing one gets each counter column increased by the row's value.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = dialect_insert(dialect, table)
+        db.session.execute(
+            insert.on_conflict_do_update(
+                index_elements=keys,
+                set_={c: table.c[c] + insert.excluded[c] for c in counters},
+            ),
+            rows,
+        )
+        return
+
+    for row in rows:
+        where = [table.c[k] == row[k] for k in keys]
+        result = db.session.execute(
+            table.update().where(*where).values({c: table.c[c] + row[c] for c in counters})
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert(), row)
+
 # associations
 user_word = db.Table(
     "user_word",
     db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
     db.Column("word_id", db.Integer, db.ForeignKey("word.id"), primary_key=True),
     db.Column("number_of_times_seen", db.Integer, default=0, nullable=False),
+    # spaced repetition schedule, see app/srs.py
+    db.Column("due_at", db.DateTime, default=datetime.utcnow, nullable=True),
+    db.Column("ease", db.Float, default=2.5, nullable=False),
+    db.Column("interval_days", db.Float, default=0.0, nullable=False),
+    db.Index("ix_user_word_user_due", "user_id", "due_at"),
+    # "who has this word", the primary key only covers lookups by user
+    db.Index("ix_user_word_word_id", "word_id"),
 )
 
 user_text = db.Table(
     "user_text",
     db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
     db.Column("text_id", db.Integer, db.ForeignKey("text.id"), primary_key=True),
+    db.Index("ix_user_text_text_id", "text_id"),
 )
 
 text_tag_association = db.Table(
     "text_tag_association",
     db.Column("text_id", db.Integer, db.ForeignKey("text.id"), primary_key=True),
     db.Column("tag_id", db.Integer, db.ForeignKey("tag.id"), primary_key=True),
+    db.Index("ix_text_tag_association_tag_id", "tag_id"),
 )
 
 # classes
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     quizzes_done = db.Column(db.Integer, default=0, nullable=False)
 
     words = db.relationship("Word", secondary=user_word, backref="users")
     texts = db.relationship("Text", secondary=user_text, backref="users")
     logs = db.relationship("Log", backref="user", lazy=True)
 
-    def __init__(self, name: str, password: str):
+    def __init__(self, name: str, password: str = None, password_hash: str = None):
+        """Pass password_hash when it was already made elsewhere (see app/passwords.py)."""
         self.name = name
-        self.set_password(password)
+        if password_hash is not None:
+            self.password_hash = password_hash
+        else:
+            self.set_password(password)
 
     def set_password(self, password: str) -> None:
         self.password_hash = generate_password_hash(password)
@@ -52,7 +130,7 @@ class User(db.Model):
 
 class Word(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    lemma = db.Column(db.String(64), nullable=False, index=True)
+    lemma = db.Column(db.String(64), nullable=False, unique=True, index=True)
     lemma_rank = db.Column(db.Integer, default=0, nullable=False)
     word_rank = db.Column(db.Integer, default=0, nullable=False)
 
@@ -60,30 +138,62 @@ class Word(db.Model):
         return f"<Word {self.lemma}>"
 
 
+@db.event.listens_for(Word, "before_insert")
+def _fill_word_ranks(mapper, connection, target):
+    if target.word_rank or target.lemma_rank:
+        return
+    target.word_rank, target.lemma_rank = word_ranks(target.lemma)
+
+
 class Text(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     title = db.Column(db.String, nullable=True)
-    content = db.Column(db.String, nullable=False)
+    # stored as bytes, maybe compressed (see app/text_codec.py); only loaded when read
+    content = deferred(db.Column(CompressedText, nullable=False))
     url = db.Column(db.String, nullable=True)
     authors = db.Column(db.String, nullable=True)
-    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # bumped on every change, Last-Modified / ETag of the article
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
 
     unique_words = db.Column(db.Integer, nullable=True)
     average_sentence_length = db.Column(db.Float, nullable=True)
     average_word_length = db.Column(db.Float, nullable=True)
     total_words = db.Column(db.Integer, nullable=True)
     difficulty = db.Column(db.Float, nullable=True)
+    # sha256 of content the stats above were computed from
+    content_hash = db.Column(db.String(64), nullable=True)
+    # start of content for result lists, filled at write time
+    excerpt = db.Column(db.String(160), nullable=True)
 
     tags = db.relationship("Tag", secondary=text_tag_association, backref="texts")
 
+    __table_args__ = (
+        # keyset pagination of listings, newest first
+        db.Index("ix_text_date_id", "date", "id"),
+    )
+
     def __repr__(self):
         return f"<Text {self.title}>"
 
 
+@db.event.listens_for(Text, "before_insert")
+@db.event.listens_for(Text, "before_update")
+def _fill_text_stats(mapper, connection, target):
+    target.updated_at = datetime.utcnow()
+    # don't pull a deferred body in just to find out nothing changed
+    if target.content_hash and not inspect(target).attrs.content.history.has_changes():
+        return
+    if target.content_hash == content_hash(target.content):
+        return
+    for key, value in text_stats(target.content).items():
+        setattr(target, key, value)
+
+
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String, nullable=False, index=True)
+    name = db.Column(db.String, nullable=False, unique=True, index=True)
 
     def __repr__(self):
         return f"<Tag {self.name}>"
@@ -95,7 +205,11 @@ class Log(db.Model):
     date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    text_id = db.Column(db.Integer, db.ForeignKey("text.id"), nullable=True)
+    text_id = db.Column(db.Integer, db.ForeignKey("text.id"), nullable=True, index=True)
+
+    __table_args__ = (
+        db.Index("ix_log_user_date", "user_id", "date"),
+    )
 
     def __repr__(self):
         return f"<Log {self.id} for User {self.user_id}>"
@@ -118,3 +232,42 @@ class Translation(db.Model):
 
     def __repr__(self):
         return f"<Translation {self.text} {self.source_lang}->{self.target_lang}>"
+
+
+class QuizAnswer(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    word_id = db.Column(db.Integer, db.ForeignKey("word.id"), nullable=False)
+    correct = db.Column(db.Boolean, nullable=False)
+    given = db.Column(db.String, nullable=True)
+    answered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_quiz_answer_user_word", "user_id", "word_id"),
+    )
+
+    def __repr__(self):
+        return f"<QuizAnswer {self.word_id} for User {self.user_id}>"
+
+
+class ReadingStats(db.Model):
+    """Running totals per user, kept in step with Log by app/reading.py."""
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    total_seconds = db.Column(db.Integer, default=0, nullable=False)
+
+    # newest Log with a text, so "continue reading" is a primary key lookup
+    last_text_id = db.Column(db.Integer, db.ForeignKey("text.id"), nullable=True)
+    last_read_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ReadingStats for User {self.user_id}>"
+
+
+class DailyReading(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    seconds = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailyReading {self.day} for User {self.user_id}>"
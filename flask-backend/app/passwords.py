@@ -0,0 +1,128 @@
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing off the request thread.
+#
+# werkzeug's hashes are slow on purpose and hold the GIL while they run,
+# so a burst of logins on one worker stalls every other request on it.
+# Here they run on a small process pool instead. At most `queue_limit`
+# hashes can be queued or running per process, past that callers get
+# HasherBusy straight away and the API answers 503 rather than piling up.
+#
+# The pool is made from a request thread, forking a process that has
+# other threads running (requests, the translate pool, the log flusher)
+# can leave the child stuck on a lock held at fork time. Workers start
+# from a fork server (spawn where there is none) instead. Like any
+# spawned process they import the main script again, under gunicorn
+# that's gunicorn's own, under `python run.py` it builds another app.
+
+
+class HasherBusy(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def method_prefix(method):
+    """The part before the first '$' that `method` produces, with werkzeug's defaults filled in."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def verify_password(password_hash, password, method):
+    """
+    Returns (matches, upgraded hash or None).
+    A hash made with other parameters than `method` is redone on success.
+    """
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if password_hash.split("$", 1)[0] != method_prefix(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = "scrypt"
+        self.workers = 0
+        self.queue_limit = 8
+        self.timeout = 10.0
+
+        self._pool = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config["PASSWORD_HASH_METHOD"]
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.queue_limit = app.config["PASSWORD_HASH_QUEUE"] or 4 * max(1, self.workers)
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self.shutdown()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        """(matches, upgraded hash or None), see verify_password."""
+        return self._run(verify_password, password_hash, password, self.method)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy()
+
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # the slot is held until the hash is actually done, even if we stop waiting
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HasherBusy()
+
+    def _get_pool(self):
+        # pools don't survive a fork, one per process
+        pid = os.getpid()
+        if self._pool is None or self._pid != pid:
+            with self._lock:
+                if self._pool is None or self._pid != pid:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+                    self._pid = pid
+        return self._pool
+
+
+def _mp_context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # instead of the default __main__, which may build a whole app
+    context.set_forkserver_preload(["app.passwords"])
+    return context
+
+
+password_hasher = PasswordHasher()
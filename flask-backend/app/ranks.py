@@ -0,0 +1,247 @@
+import array
+import bisect
+import mmap
+import os
+import struct
+import threading
+
+# Word frequency ranks for Word.lemma_rank / Word.word_rank.
+#
+# The source is a plain text list, one word per line, most frequent first
+# (anything after the first whitespace on a line, e.g. a count, is ignored).
+# `flask build-word-index` compiles it into a binary file that is mmap'd,
+# so a worker can start answering lookups without parsing anything.
+#
+# Binary layout (native byte order):
+#   magic (8 bytes) | n (uint32) | offsets (n + 1 uint32) | ranks (n uint32) | words blob
+# words are utf-8, sorted, offsets[i]:offsets[i + 1] slices word i out of the blob.
+
+MAGIC = b"WFRQIDX1"
+HEADER = struct.Struct("<8sI")
+
+
+class _SortedWords:
+    """Sequence view over the words blob, so bisect can search it directly."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+def _read_word_list(path):
+    ranks = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].strip().lower()
+            if word and word not in ranks:
+                ranks[word] = len(ranks) + 1
+    return ranks
+
+
+def build_index(src_path, dest_path):
+    """Compiles a text frequency list into the binary index. Returns the word count."""
+    ranks = _read_word_list(src_path)
+    words = sorted(w.encode("utf-8") for w in ranks)
+
+    offsets = array.array("I", [0])
+    rank_arr = array.array("I")
+    for w in words:
+        offsets.append(offsets[-1] + len(w))
+        rank_arr.append(ranks[w.decode("utf-8")])
+
+    tmp_path = dest_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(words)))
+        f.write(offsets.tobytes())
+        f.write(rank_arr.tobytes())
+        f.write(b"".join(words))
+    os.replace(tmp_path, dest_path)
+
+    return len(words)
+
+
+class FrequencyIndex:
+    """
+    word -> frequency rank (1 = most common, 0 = unknown).
+    Loads on first lookup, O(log n) per lookup via bisect.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._words = None
+        self._ranks = None
+
+    def init_app(self, app):
+        self.path = app.config["WORD_FREQ_PATH"]
+        self._loaded = False
+        self._words = None
+        self._ranks = None
+
+    @property
+    def index_path(self):
+        return self.path + ".idx" if self.path else None
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            if not self.path:
+                return
+
+            idx = self.index_path
+            if os.path.exists(idx) and (
+                not os.path.exists(self.path)
+                or os.path.getmtime(idx) >= os.path.getmtime(self.path)
+            ):
+                self._load_mmap(idx)
+            elif os.path.exists(self.path):
+                self._load_text(self.path)
+
+    def _load_mmap(self, idx_path):
+        with open(idx_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{idx_path} is not a word frequency index")
+
+        view = memoryview(mm)
+        start = HEADER.size
+        offsets = view[start:start + 4 * (n + 1)].cast("I")
+        start += 4 * (n + 1)
+        self._ranks = view[start:start + 4 * n].cast("I")
+        start += 4 * n
+        self._words = _SortedWords(offsets, view[start:])
+
+    def _load_text(self, path):
+        ranks = _read_word_list(path)
+        words = sorted(w.encode("utf-8") for w in ranks)
+
+        offsets = array.array("I", [0])
+        for w in words:
+            offsets.append(offsets[-1] + len(w))
+        self._ranks = array.array("I", (ranks[w.decode("utf-8")] for w in words))
+        self._words = _SortedWords(offsets, b"".join(words))
+
+    def rank(self, word):
+        if not self._loaded:
+            self._load()
+        if self._words is None or not word:
+            return 0
+
+        key = word.strip().lower().encode("utf-8")
+        i = bisect.bisect_left(self._words, key)
+        if i < len(self._words) and self._words[i] == key:
+            return self._ranks[i]
+        return 0
+
+    def __contains__(self, word):
+        return self.rank(word) > 0
+
+
+# --- lemmatizer ---
+
+IRREGULAR = {
+    "am": "be", "is": "be", "are": "be", "was": "be", "were": "be", "been": "be", "being": "be",
+    "has": "have", "had": "have", "having": "have",
+    "does": "do", "did": "do", "done": "do",
+    "went": "go", "gone": "go", "goes": "go",
+    "made": "make", "said": "say", "saw": "see", "seen": "see",
+    "took": "take", "taken": "take", "came": "come", "got": "get", "gotten": "get",
+    "knew": "know", "known": "know", "thought": "think", "told": "tell",
+    "found": "find", "gave": "give", "given": "give", "left": "leave",
+    "felt": "feel", "brought": "bring", "began": "begin", "begun": "begin",
+    "kept": "keep", "held": "hold", "wrote": "write", "written": "write",
+    "stood": "stand", "heard": "hear", "meant": "mean", "met": "meet",
+    "ran": "run", "paid": "pay", "sat": "sit", "spoke": "speak", "spoken": "speak",
+    "led": "lead", "grew": "grow", "grown": "grow", "lost": "lose",
+    "fell": "fall", "fallen": "fall", "sent": "send", "built": "build",
+    "understood": "understand", "drew": "draw", "drawn": "draw",
+    "broke": "break", "broken": "break", "spent": "spend", "ate": "eat", "eaten": "eat",
+    "bought": "buy", "caught": "catch", "taught": "teach", "sold": "sell",
+    "won": "win", "chose": "choose", "chosen": "choose", "slept": "sleep",
+    "better": "good", "best": "good", "worse": "bad", "worst": "bad",
+    "children": "child", "men": "man", "women": "woman", "people": "person",
+    "feet": "foot", "teeth": "tooth", "mice": "mouse", "geese": "goose",
+}
+
+# (suffix, replacement), tried in order, every match is a candidate
+SUFFIX_RULES = [
+    ("ies", "y"), ("ied", "y"), ("ier", "y"), ("iest", "y"),
+    ("ves", "f"), ("ves", "fe"),
+    ("sses", "ss"), ("xes", "x"), ("ches", "ch"), ("shes", "sh"), ("oes", "o"),
+    ("es", "e"), ("es", ""), ("s", ""),
+    ("ing", ""), ("ing", "e"),
+    ("ed", ""), ("ed", "e"),
+    ("est", ""), ("est", "e"), ("er", ""), ("er", "e"),
+    ("ly", ""),
+]
+
+MIN_STEM_LENGTH = 3
+
+
+def _candidates(word):
+    if word in IRREGULAR:
+        yield IRREGULAR[word]
+
+    for suffix, replacement in SUFFIX_RULES:
+        if len(word) > len(suffix) + 1 and word.endswith(suffix):
+            stem = word[: -len(suffix)]
+            # only -> on, thing -> th: too little left to be a lemma, counted
+            # with the replacement so boxes -> box, used -> use, tied -> tie pass
+            if len(stem + replacement) >= MIN_STEM_LENGTH:
+                yield stem + replacement
+            # running -> run, stopped -> stop
+            if replacement == "" and len(stem) > MIN_STEM_LENGTH and stem[-1] == stem[-2]:
+                yield stem[:-1]
+
+
+def lemmatize(word, index=None):
+    """
+    Maps an inflected form to its lemma.
+    With an index, a word the index knows is its own lemma (forest, news,
+    evening) unless it's an irregular form; for anything else the most
+    frequent candidate the index knows wins. Without an index, returns the
+    first rule-based guess (or the word itself).
+    """
+    word = (word or "").strip().lower()
+    if not word:
+        return word
+
+    candidates = list(_candidates(word))
+    if index is None:
+        return candidates[0] if candidates else word
+    if word not in IRREGULAR and index.rank(word):
+        return word
+
+    best, best_rank = word, 0
+    for candidate in candidates:
+        rank = index.rank(candidate)
+        if rank and (not best_rank or rank < best_rank):
+            best, best_rank = candidate, rank
+    return best if best_rank else word
+
+
+def word_ranks(word, index=None):
+    """Returns (word_rank, lemma_rank) for a word as the user typed it."""
+    index = index or frequency_index
+    word = (word or "").strip().lower()
+    word_rank = index.rank(word)
+    lemma_rank = index.rank(lemmatize(word, index)) or word_rank
+    return word_rank, lemma_rank
+
+
+frequency_index = FrequencyIndex()
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import datetime
+
+from app.models import db, insert_or_increment, Log, ReadingStats, DailyReading, Text
+
+# Reading time is written as Log rows plus two maintained aggregates,
+# ReadingStats (per user total and last text read) and DailyReading
+# (per user per day), all in the caller's transaction so they can't
+# drift apart.
+
+
+def record_reading(entries):
+    """
+    entries: list of dicts with user_id, text_id, elapsed_time_seconds
+    and optionally date. Inserts the logs and bumps the aggregates.
+    """
+    if not entries:
+        return
+
+    now = datetime.utcnow()
+    logs = [
+        {
+            "user_id": e["user_id"],
+            "text_id": e["text_id"],
+            "elapsed_time_seconds": e["elapsed_time_seconds"],
+            "date": e.get("date") or now,
+        }
+        for e in entries
+    ]
+    db.session.execute(Log.__table__.insert(), logs)
+    _apply(logs, sign=1)
+
+    latest = {}
+    for log in logs:
+        if log["text_id"] is None:
+            continue
+        current = latest.get(log["user_id"])
+        if current is None or log["date"] >= current["b_date"]:
+            latest[log["user_id"]] = {
+                "b_user_id": log["user_id"],
+                "b_text_id": log["text_id"],
+                "b_date": log["date"],
+            }
+
+    if latest:
+        table = ReadingStats.__table__
+        db.session.execute(
+            table.update()
+            .where(
+                table.c.user_id == db.bindparam("b_user_id"),
+                db.or_(table.c.last_read_at.is_(None), table.c.last_read_at <= db.bindparam("b_date")),
+            )
+            .values(last_text_id=db.bindparam("b_text_id"), last_read_at=db.bindparam("b_date")),
+            list(latest.values()),
+        )
+
+
+def forget_reading(text_id):
+    """Deletes a text's logs and takes them back out of the aggregates."""
+    logs = [
+        {"user_id": user_id, "date": date, "elapsed_time_seconds": seconds}
+        for user_id, date, seconds in db.session.execute(
+            db.select(Log.user_id, Log.date, Log.elapsed_time_seconds)
+            .where(Log.text_id == text_id)
+        ).all()
+    ]
+    Log.query.filter_by(text_id=text_id).delete(synchronize_session=False)
+    _apply(logs, sign=-1)
+
+    # anyone whose last text was this one falls back to their previous log
+    affected = db.session.execute(
+        db.select(ReadingStats.user_id).where(ReadingStats.last_text_id == text_id)
+    ).scalars().all()
+    if affected:
+        db.session.execute(
+            ReadingStats.__table__.update()
+            .where(ReadingStats.user_id.in_(affected))
+            .values(_last_pointer_values())
+        )
+
+
+def _apply(logs, sign):
+    totals = defaultdict(int)
+    daily = defaultdict(int)
+    for log in logs:
+        totals[log["user_id"]] += log["elapsed_time_seconds"]
+        daily[(log["user_id"], log["date"].date())] += log["elapsed_time_seconds"]
+
+    insert_or_increment(
+        ReadingStats.__table__,
+        [{"user_id": uid, "total_seconds": sign * s} for uid, s in totals.items()],
+        keys=["user_id"],
+        counters=["total_seconds"],
+    )
+    insert_or_increment(
+        DailyReading.__table__,
+        [{"user_id": uid, "day": day, "seconds": sign * s} for (uid, day), s in daily.items()],
+        keys=["user_id", "day"],
+        counters=["seconds"],
+    )
+
+
+def _last_pointer_values():
+    """Correlated subqueries that recompute last_text_id / last_read_at from Log."""
+    newest = (
+        db.select(Log.text_id, Log.date)
+        .where(Log.user_id == ReadingStats.user_id, Log.text_id.isnot(None))
+        .order_by(Log.date.desc())
+        .limit(1)
+    )
+    return {
+        "last_text_id": newest.with_only_columns(Log.text_id).scalar_subquery(),
+        "last_read_at": newest.with_only_columns(Log.date).scalar_subquery(),
+    }
+
+
+def total_seconds(user_id):
+    return db.session.execute(
+        db.select(ReadingStats.total_seconds).where(ReadingStats.user_id == user_id)
+    ).scalar() or 0
+
+
+def reading_summary(user_id):
+    """
+    (total_seconds, last text id, last text title) in one query.
+    Missing parts come back as 0 / None.
+    """
+    row = db.session.execute(
+        db.select(ReadingStats.total_seconds, Text.id, Text.title)
+        .outerjoin(Text, Text.id == ReadingStats.last_text_id)
+        .where(ReadingStats.user_id == user_id)
+    ).first()
+    if not row:
+        return 0, None, None
+    return row[0] or 0, row[1], row[2]
+
+
+def rebuild_aggregates(conn=None):
+    """Recomputes both aggregates from Log, for recovering from drift."""
+    execute = (conn or db.session).execute
+    execute(DailyReading.__table__.delete())
+    execute(ReadingStats.__table__.delete())
+
+    execute(
+        ReadingStats.__table__.insert().from_select(
+            ["user_id", "total_seconds"],
+            db.select(Log.user_id, db.func.sum(Log.elapsed_time_seconds)).group_by(Log.user_id),
+        )
+    )
+    day = db.func.date(Log.date)
+    execute(
+        DailyReading.__table__.insert().from_select(
+            ["user_id", "day", "seconds"],
+            db.select(Log.user_id, day, db.func.sum(Log.elapsed_time_seconds))
+            .group_by(Log.user_id, day),
+        )
+    )
+    execute(ReadingStats.__table__.update().values(_last_pointer_values()))
@@ -1,76 +1,138 @@
+import base64
+import json
 import random
-import requests
 from flask import Blueprint, request, jsonify, session
-from app.models import db, User, Word, Text, Tag, Log, Translation, user_word, user_text
+from app.models import (
+    db, insert_ignore, User, Word, Text, Tag, Translation, QuizAnswer,
+    user_word, user_text)
+from app.log_buffer import reading_log_buffer
+from app.passwords import password_hasher, HasherBusy
+from app.ranks import word_ranks
+from app.reading import (
+    forget_reading, reading_summary, total_seconds as reading_total_seconds)
+from app.search import search_backend, plain_snippet
+from app.srs import next_review
+from app.storage import storage
+from app.translate_client import translate_client
+from app.translation_cache import translation_cache, upstream_flight, CachedTranslation
+from app.user_cache import user_cache
 from flask import current_app as app
 from flask_jwt_extended import (
-    create_access_token, get_jwt_identity,
+    create_access_token, current_user,
     jwt_required, set_access_cookies, unset_jwt_cookies, get_jwt)
 from datetime import timedelta, datetime, timezone
 from sqlalchemy import func
+from sqlalchemy.orm import defer, selectinload
 
 # Helper functions
 def get_minutes_read(user_id):
-    total_seconds = (
-        db.session.query(func.coalesce(func.sum(Log.elapsed_time_seconds), 0))
-        .filter(Log.user_id == user_id)
-        .scalar()
-    ) or 0
+    return int(reading_total_seconds(user_id) // 60)
 
-    return int(total_seconds // 60)
+def fetch_translation(text, source='en', target='zh'):
+    """
+    Asks the upstream translator for one string.
+    Returns the translated text, or None if it failed.
+    Does not touch the database, so it is safe to run in worker threads.
+    """
+    return translate_client.translate(text, source, target)
 
 def get_or_create_translation(text, source='en', target='zh'):
     normalized = (text or '').strip()
     if not normalized:
         return None
 
+    key = (normalized, source, target)
+    hit, cached = translation_cache.lookup(key)
+    if hit:
+        return cached
+
     t = Translation.query.filter_by(
         text=normalized,
         source_lang=source,
         target_lang=target
     ).first()
     if t:
+        translation_cache.put(key, _cached_translation(t))
         return t
 
-    base_url = "https://translate.googleapis.com/translate_a/single"
-    params = {
-        "client": "gtx",
-        "sl": source,   # source language, e.g. 'en'
-        "tl": target,   # target language, e.g. 'zh'
-        "dt": ["t", "bd"],  # multiple dt params -> main text + dictionary
-        "dj": "1",
-        "q": normalized,
-    }
-
-    try:
-        resp = requests.get(base_url, params=params, timeout=8)
-        resp.raise_for_status()
-        data = resp.json()
-
-        sentences = data.get("sentences", [])
-        translated = "".join(s.get("trans", "") for s in sentences).strip()
-        if not translated:
-            return None
-    except Exception:
+    # concurrent misses for the same word share one upstream request
+    translated = upstream_flight.do(
+        key, lambda: fetch_translation(normalized, source, target)
+    )
+    if not translated:
+        translation_cache.put_negative(key)
         return None
 
-    t = Translation(
+    # another request may have inserted it meanwhile, so don't race on
+    # uix_translation_text_langs, just read back whichever row won
+    insert_ignore(Translation.__table__, [{
+        'text': normalized,
+        'source_lang': source,
+        'target_lang': target,
+        'translated_text': translated,
+    }])
+    t = Translation.query.filter_by(
         text=normalized,
         source_lang=source,
-        target_lang=target,
-        translated_text=translated,
-    )
-    db.session.add(t)
-    db.session.flush()
+        target_lang=target
+    ).first()
+    if t:
+        translation_cache.put(key, _cached_translation(t))
 
     return t
 
-def _get_user_or_401():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return None, (jsonify({'error': 'Unauthorized'}), 401)
-    return user, None
+def _cached_translation(t):
+    return CachedTranslation(t.text, t.source_lang, t.target_lang, t.translated_text)
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Returns the list encoded by encode_cursor, or None if the token is bad."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def is_int(value):
+    # bool is an int subclass, but never a valid id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_number(value):
+    return is_int(value) or isinstance(value, float)
+
+def word_bank_query(user_id, source='en', target='zh'):
+    """
+    (Word, number_of_times_seen, translated_text) rows for one user's word bank,
+    user_word -> Word -> Translation in a single joined query.
+    """
+    return (
+        db.session.query(Word, user_word.c.number_of_times_seen, Translation.translated_text)
+        .join(user_word, user_word.c.word_id == Word.id)
+        .outerjoin(Translation, db.and_(
+            Translation.text == Word.lemma,
+            Translation.source_lang == source,
+            Translation.target_lang == target,
+        ))
+        .filter(user_word.c.user_id == user_id)
+    )
+
+def user_has_word(user_id, word_id):
+    """Word bank membership, an EXISTS on the user_word primary key."""
+    return db.session.execute(
+        db.select(db.exists().where(
+            user_word.c.user_id == user_id,
+            user_word.c.word_id == word_id,
+        ))
+    ).scalar()
+
+def busy_response():
+    resp = jsonify({'error': 'Server busy, try again shortly'})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
 
 # ---authentication routes---
 auth = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -98,7 +160,12 @@ def register():
     if User.query.filter_by(name=name).first():
         return jsonify({'error': 'username already exists'}), 409
 
-    user = User(name=name, password=password)
+    try:
+        password_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return busy_response()
+
+    user = User(name=name, password_hash=password_hash)
     db.session.add(user)
     db.session.commit()
 
@@ -131,9 +198,21 @@ def login():
         return jsonify({'error': 'missing fields'}), 400
 
     user = User.query.filter_by(name=name.strip()).first()
-    if not user or not user.verify_password(password):
+    if not user:
         return jsonify({'error': 'Invalid credentials'}), 401
 
+    try:
+        ok, upgraded_hash = password_hasher.verify(user.password_hash, password)
+    except HasherBusy:
+        return busy_response()
+    if not ok:
+        return jsonify({'error': 'Invalid credentials'}), 401
+
+    # old hash parameters, swap in one made with the current ones
+    if upgraded_hash:
+        user.password_hash = upgraded_hash
+        db.session.commit()
+
     access_token = create_access_token(identity=str(user.id))
     resp = jsonify({
         'user': {
@@ -161,10 +240,7 @@ users = Blueprint('users', __name__, url_prefix='/api/users')
 @users.route('/me', methods=['GET'])
 @jwt_required()
 def get_me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
+    user = current_user
 
     return jsonify({
         'user': {
@@ -178,84 +254,168 @@ def get_me():
 @users.route('/last-reading', methods=['GET'])
 @jwt_required()
 def last_reading():
-    user_id = get_jwt_identity()
+    _, text_id, title = reading_summary(current_user.id)
+    if not text_id:
+        return jsonify({'last': None}), 200
 
-    last_log = (Log.query
-                  .filter_by(user_id=user_id)
-                  .filter(Log.text_id.isnot(None))
-                  .order_by(Log.date.desc())
-                  .first())
+    return jsonify({'last': {'id': text_id, 'title': title}}), 200
 
-    if not last_log:
-        return jsonify({'last': None}), 200
+@users.route('/bootstrap', methods=['GET'])
+@jwt_required()
+def bootstrap():
+    """Everything the app needs on load, in one request."""
+    user = current_user
 
-    text = Text.query.get(last_log.text_id)
-    if not text:
-        return jsonify({'last': None}), 200
+    seconds, text_id, title = reading_summary(user.id)
+    word_count = db.session.execute(
+        db.select(func.count()).select_from(user_word).where(user_word.c.user_id == user.id)
+    ).scalar()
 
-    return jsonify({'last': {'id': text.id, 'title': text.title}}), 200
+    return jsonify({
+        'user': {
+            'id': user.id,
+            'name': user.name,
+            'quizzes_done': user.quizzes_done,
+            'minutes_read': int(seconds // 60),
+        },
+        'last': {'id': text_id, 'title': title} if text_id else None,
+        'word_count': word_count,
+    }), 200
 
 # ---Articles routes---
 articles = Blueprint('articles', __name__, url_prefix='/api/articles')
 
+def article_etag(article):
+    """Changes whenever the article row or its body does."""
+    stamp = article.updated_at or article.date
+    return f"{article.id}-{(article.content_hash or '')[:16]}-{stamp.timestamp() if stamp else 0}"
+
+def article_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    # HTTP dates have whole seconds
+    return bool(since and last_modified
+                and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None))
+
 @articles.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_article(id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
+    # content is deferred, a revalidation never reads (or decompresses) the body
     article = Text.query.get_or_404(id)
-    return jsonify({
-        'article': {
-            'id': article.id,
-            'title': article.title,
-            'content': article.content,
-            'url': article.url,
-            'authors': article.authors,
-            'date': article.date.isoformat() if article.date else None,
-            'unique_words': article.unique_words,
-            'average_sentence_length': article.average_sentence_length,
-            'average_word_length': article.average_word_length,
-            'total_words': article.total_words,
-            'difficulty': article.difficulty,
-            'tags': [tag.name for tag in article.tags]
-        }
-    })
+
+    etag = article_etag(article)
+    last_modified = article.updated_at or article.date
+    if article_not_modified(etag, last_modified):
+        resp = app.response_class(status=304)
+    else:
+        resp = jsonify({
+            'article': {
+                'id': article.id,
+                'title': article.title,
+                'content': article.content,
+                'url': article.url,
+                'authors': article.authors,
+                'date': article.date.isoformat() if article.date else None,
+                'unique_words': article.unique_words,
+                'average_sentence_length': article.average_sentence_length,
+                'average_word_length': article.average_word_length,
+                'total_words': article.total_words,
+                'difficulty': article.difficulty,
+                'tags': [tag.name for tag in article.tags]
+            }
+        })
+
+    resp.set_etag(etag)
+    if last_modified:
+        resp.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # behind auth: the browser may keep it, but has to check back every time
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+MAX_SEGMENT_SECONDS = 6 * 60 * 60
+
+def parse_elapsed_time(value):
+    """Returns (seconds, error message)."""
+    try:
+        elapsed_time = int(value if value is not None else 0)
+    except (TypeError, ValueError):
+        return None, 'elapsed_time_seconds must be an integer'
+    if elapsed_time <= 0:
+        return None, 'elapsed_time_seconds must be > 0'
+    if elapsed_time > MAX_SEGMENT_SECONDS:
+        return None, 'elapsed_time_seconds too large'
+    return elapsed_time, None
 
 @articles.route('/<int:id>/reading-time', methods=['POST'])
 @jwt_required()
 def log_reading_time(id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
+    user = current_user
 
     data = request.json or {}
-    try:
-        elapsed_time = int(data.get('elapsed_time_seconds', 0))
-    except (TypeError, ValueError):
-        return jsonify({'error': 'elapsed_time_seconds must be an integer'}), 400
-
-    if elapsed_time <= 0:
-        return jsonify({'error': 'elapsed_time_seconds must be > 0'}), 400
-    if elapsed_time > 6 * 60 * 60:
-        return jsonify({'error': 'elapsed_time_seconds too large'}), 400
+    elapsed_time, error = parse_elapsed_time(data.get('elapsed_time_seconds'))
+    if error:
+        return jsonify({'error': error}), 400
 
     if not Text.query.get(id):
         return jsonify({'error': 'Article not found'}), 404
 
-    log = Log(elapsed_time_seconds=elapsed_time, user_id=user.id, text_id=id)
-    db.session.add(log)
-    db.session.commit()
+    reading_log_buffer.add([{
+        'user_id': user.id,
+        'text_id': id,
+        'elapsed_time_seconds': elapsed_time,
+    }])
 
     return jsonify({'readingTime': elapsed_time}), 200
 
+@articles.route('/reading-time/bulk', methods=['POST'])
+@jwt_required()
+def log_reading_time_bulk():
+    """
+    Many reading segments in one call:
+    {"segments": [{"text_id": 1, "elapsed_time_seconds": 30}, ...]}
+    Everything is validated up front, nothing is written if any segment is bad.
+    """
+    user = current_user
+
+    segments = (request.json or {}).get('segments')
+    if not isinstance(segments, list) or not segments:
+        return jsonify({'error': 'segments must be a non-empty list'}), 400
+    if len(segments) > app.config['READING_BULK_MAX']:
+        return jsonify({'error': f"At most {app.config['READING_BULK_MAX']} segments per request"}), 400
+
+    entries = []
+    for i, segment in enumerate(segments):
+        if not isinstance(segment, dict):
+            return jsonify({'error': f'segments[{i}] must be an object'}), 400
+        text_id = segment.get('text_id')
+        if not isinstance(text_id, int) or isinstance(text_id, bool):
+            return jsonify({'error': f'segments[{i}].text_id must be an integer'}), 400
+        elapsed_time, error = parse_elapsed_time(segment.get('elapsed_time_seconds'))
+        if error:
+            return jsonify({'error': f'segments[{i}]: {error}'}), 400
+        entries.append({'user_id': user.id, 'text_id': text_id, 'elapsed_time_seconds': elapsed_time})
+
+    text_ids = {e['text_id'] for e in entries}
+    found = set(db.session.execute(
+        db.select(Text.id).where(Text.id.in_(text_ids))
+    ).scalars())
+    missing = sorted(text_ids - found)
+    if missing:
+        return jsonify({'error': 'Article not found', 'text_ids': missing}), 404
+
+    reading_log_buffer.add(entries)
+
+    return jsonify({
+        'accepted': len(entries),
+        'readingTime': sum(e['elapsed_time_seconds'] for e in entries),
+    }), 202 if reading_log_buffer.enabled else 200
+
 @articles.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_article(id):
-    user_id = get_jwt_identity()
+    # buffered logs for this text have to land before they're subtracted
+    reading_log_buffer.flush()
 
     article = Text.query.get(id)
     if not article:
@@ -264,40 +424,114 @@ def delete_article(id):
     from app.models import user_text
     db.session.execute(user_text.delete().where(user_text.c.text_id == id))
 
-    Log.query.filter_by(text_id=id).delete(synchronize_session=False)
+    forget_reading(id)
 
     db.session.delete(article)
     db.session.commit()
 
     return jsonify({'deleted': id}), 200
 
+@articles.route('', methods=['GET'])
 @articles.route('/search', methods=['GET'])
 @jwt_required()
 def search_articles():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
+    user = current_user
 
+    q = (request.args.get('q') or '').strip()
     title = (request.args.get('title') or '').strip()
     tag = (request.args.get('tag') or '').strip()
-    limit = min(int(request.args.get('limit', 20)), 50)
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, 50))
+
+    ranked = search_backend.enabled and bool(q or title or tag)
+
+    # cursors are ['r', score, id] for ranked results, ['d', date, id] otherwise
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor)
+        if not after or len(after) != 3 or after[0] != ('r' if ranked else 'd'):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if not is_int(after[2]) or (ranked and not is_number(after[1])):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if not ranked:
+            try:
+                after[1] = datetime.fromisoformat(after[1])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+    # never load article bodies for a result list
+    lean = (defer(Text.content), selectinload(Text.tags))
+
+    if ranked:
+        hits = search_backend.search(
+            user.id, q=q, title=title, tag=tag, limit=limit + 1,
+            after=after[1:] if after else None,
+        )
+
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            last_id, last_score, _ = hits[-1]
+            next_cursor = encode_cursor(['r', last_score, last_id])
+
+        by_id = {}
+        if hits:
+            by_id = {
+                a.id: a
+                for a in Text.query.options(*lean).filter(Text.id.in_([h[0] for h in hits])).all()
+            }
 
-    query = Text.query.join(user_text, user_text.c.text_id == Text.id)\
+        return jsonify({
+            'results': [{
+                'id': a.id,
+                'title': a.title,
+                'authors': a.authors,
+                'url': a.url,
+                'difficulty': a.difficulty,
+                'tags': [t.name for t in a.tags],
+                'excerpt': plain_snippet(highlight),
+                'highlight': highlight,
+                'score': score,
+                'date': a.date.isoformat() if a.date else None,
+            } for a, score, highlight in (
+                (by_id.get(text_id), score, highlight) for text_id, score, highlight in hits
+            ) if a],
+            'next_cursor': next_cursor,
+        })
+
+    query = Text.query.options(*lean)\
+                      .join(user_text, user_text.c.text_id == Text.id)\
                       .filter(user_text.c.user_id == user.id)
 
+    # no full-text index on this database, plain substring match
+    if q:
+        fields = [Text.title, Text.excerpt]
+        # bodies are binary (see app/text_codec.py), only SQLite will LIKE them
+        if db.engine.dialect.name == 'sqlite':
+            fields.append(Text.content)
+        query = query.filter(db.or_(*(field.ilike(f'%{q}%') for field in fields)))
+
     if title:
         query = query.filter(Text.title.ilike(f'%{title}%'))
 
     if tag:
         query = query.join(Text.tags).filter(Tag.name.ilike(f'%{tag}%'))
 
-    articles = query.order_by(Text.date.desc()).limit(limit).all()
+    # keyset on (date, id), walks ix_text_date_id, same cost at any depth
+    if after:
+        query = query.filter(db.tuple_(Text.date, Text.id) < db.tuple_(after[1], after[2]))
+
+    articles = query.order_by(Text.date.desc(), Text.id.desc()).limit(limit + 1).all()
 
-    def excerpt(text, length=140):
-        if not text:
-            return ''
-        return text[:length] + ('…' if len(text) > length else '')
+    next_cursor = None
+    if len(articles) > limit:
+        articles = articles[:limit]
+        last = articles[-1]
+        next_cursor = encode_cursor(['d', last.date.isoformat(), last.id])
 
     return jsonify({
         'results': [{
@@ -307,9 +541,10 @@ def search_articles():
             'url': a.url,
             'difficulty': a.difficulty,
             'tags': [t.name for t in a.tags],
-            'excerpt': excerpt(a.content),
+            'excerpt': a.excerpt or '',
             'date': a.date.isoformat() if a.date else None,
-        } for a in articles]
+        } for a in articles],
+        'next_cursor': next_cursor,
     })
 
 
@@ -320,9 +555,7 @@ quizzes = Blueprint('quizzes', __name__, url_prefix='/api/quizzes')
 @quizzes.route('/wordbank', methods=['GET'])
 @jwt_required()
 def generate_wordbank_quiz():
-    user, error_resp = _get_user_or_401()
-    if error_resp:
-        return error_resp
+    user = current_user
 
     try:
         limit = int(request.args.get('limit', 10))
@@ -330,30 +563,39 @@ def generate_wordbank_quiz():
         limit = 10
     limit = max(1, min(limit, 50))
 
-    candidates = []
-    for w in user.words:
-        t = Translation.query.filter_by(
-            text=w.lemma,
-            source_lang='en',
-            target_lang='zh'
-        ).first()
-        if t and t.translated_text:
-            candidates.append((w, t))
-
-    if not candidates:
+    translated = word_bank_query(user.id).filter(
+        Translation.translated_text.isnot(None),
+        Translation.translated_text != '',
+    )
+
+    # most overdue first, straight off the (user_id, due_at) index
+    now = datetime.utcnow()
+    rows = (translated
+            .filter(db.or_(user_word.c.due_at.is_(None), user_word.c.due_at <= now))
+            .order_by(user_word.c.due_at.asc())
+            .limit(limit)
+            .all())
+
+    # not enough due words, top up with random ones
+    if len(rows) < limit:
+        picked = [w.id for w, _, _ in rows]
+        filler = translated
+        if picked:
+            filler = filler.filter(Word.id.notin_(picked))
+        rows += filler.order_by(func.random()).limit(limit - len(rows)).all()
+
+    if not rows:
         return jsonify({'error': 'No words with translations in wordbank'}), 400
 
-    if len(candidates) > limit:
-        candidates = random.sample(candidates, limit)
-    else:
-        random.shuffle(candidates)
+    candidates = [(w, zh_text) for w, _, zh_text in rows]
+    random.shuffle(candidates)
 
     questions = []
-    for w, t in candidates:
+    for w, zh_text in candidates:
         lemma = (w.lemma or '').strip()
         questions.append({
             'id': w.id,
-            'zh': t.translated_text,
+            'zh': zh_text,
             'hint': lemma[0] if lemma else None,
         })
 
@@ -366,9 +608,7 @@ def generate_wordbank_quiz():
 @quizzes.route('/wordbank/submit', methods=['POST'])
 @jwt_required()
 def submit_wordbank_quiz():
-    user, error_resp = _get_user_or_401()
-    if error_resp:
-        return error_resp
+    user = current_user
 
     data = request.json or {}
     answers = data.get('answers') or []
@@ -376,42 +616,38 @@ def submit_wordbank_quiz():
     if not isinstance(answers, list) or not answers:
         return jsonify({'error': 'Missing or empty answers list'}), 400
 
-    total = 0
-    correct = 0
-    details = []
-
-    touched_word_ids = set()
-
+    parsed = []
     for item in answers:
         try:
             wid = int(item.get('id'))
-        except (TypeError, ValueError):
+        except (TypeError, ValueError, AttributeError):
             continue
+        parsed.append((wid, (item.get('answer') or '').strip()))
 
-        given_raw = (item.get('answer') or '').strip()
-        if not given_raw:
-            word_obj = Word.query.get(wid)
-            if not word_obj:
-                continue
-            expected = (word_obj.lemma or '').strip()
-            total += 1
-            details.append({
-                'id': wid,
-                'correct': False,
-                'expected': expected,
-                'given': given_raw,
-            })
-            touched_word_ids.add(wid)
-            continue
+    # every referenced word in one IN query
+    word_ids = {wid for wid, _ in parsed}
+    words_by_id = {}
+    if word_ids:
+        words_by_id = {w.id: w for w in Word.query.filter(Word.id.in_(word_ids)).all()}
 
-        word_obj = Word.query.get(wid)
+    total = 0
+    correct = 0
+    details = []
+    attempts = []
+
+    # word id -> answered correctly every time it came up
+    touched_word_ids = {}
+    now = datetime.utcnow()
+
+    for wid, given_raw in parsed:
+        word_obj = words_by_id.get(wid)
         if not word_obj:
             continue
 
         expected = (word_obj.lemma or '').strip()
         total += 1
 
-        is_correct = expected.lower() == given_raw.lower()
+        is_correct = bool(given_raw) and expected.lower() == given_raw.lower()
         if is_correct:
             correct += 1
 
@@ -421,25 +657,69 @@ def submit_wordbank_quiz():
             'expected': expected,
             'given': given_raw,
         })
-        touched_word_ids.add(wid)
+        attempts.append({
+            'user_id': user.id,
+            'word_id': wid,
+            'correct': is_correct,
+            'given': given_raw,
+            'answered_at': now,
+        })
+        touched_word_ids[wid] = touched_word_ids.get(wid, True) and is_correct
 
     if touched_word_ids:
-        for wid in touched_word_ids:
+        schedules = db.session.execute(
+            db.select(
+                user_word.c.word_id,
+                user_word.c.number_of_times_seen,
+                user_word.c.ease,
+                user_word.c.interval_days,
+            ).where(
+                user_word.c.user_id == user.id,
+                user_word.c.word_id.in_(touched_word_ids),
+            )
+        ).all()
+
+        updates = {}
+        for wid, seen, ease, interval_days in schedules:
+            updates[wid] = next_review(seen, ease, interval_days, touched_word_ids[wid], now)
+
+        # one set-based UPDATE, per-word schedule values picked with CASE
+        if updates:
+            def per_word(field):
+                return db.case(
+                    {wid: sched[field] for wid, sched in updates.items()},
+                    value=user_word.c.word_id,
+                )
+
             db.session.execute(
                 user_word.update()
                 .where(
                     user_word.c.user_id == user.id,
-                    user_word.c.word_id == wid,
+                    user_word.c.word_id.in_(updates),
                 )
                 .values(
-                    number_of_times_seen=user_word.c.number_of_times_seen + 1
+                    number_of_times_seen=user_word.c.number_of_times_seen + 1,
+                    ease=per_word('ease'),
+                    interval_days=per_word('interval_days'),
+                    due_at=per_word('due_at'),
                 )
             )
 
+    if attempts:
+        db.session.execute(QuizAnswer.__table__.insert(), attempts)
+
+    # incremented in SQL, current_user may be a cached snapshot that
+    # another worker has already moved past
     if total > 0:
-        user.quizzes_done = (user.quizzes_done or 0) + 1
+        db.session.execute(
+            User.__table__.update()
+            .where(User.__table__.c.id == user.id)
+            .values(quizzes_done=User.__table__.c.quizzes_done + 1)
+        )
 
     db.session.commit()
+    if total > 0:
+        user_cache.invalidate(user.id)
 
     accuracy = (correct / total) if total > 0 else 0.0
 
@@ -456,11 +736,6 @@ translations = Blueprint('translations', __name__, url_prefix='/api/translations
 @translations.route('', methods=['GET'])
 @jwt_required()
 def get_translations():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     text = request.args.get('text')
     source = request.args.get('source', 'en')
     target = request.args.get('target', 'zh')
@@ -471,6 +746,7 @@ def get_translations():
     t = get_or_create_translation(text, source=source, target=target)
     if not t:
         return jsonify({'error': 'Could not translate'}), 502
+    db.session.commit()
 
     return jsonify({
         'translation': t.translated_text,
@@ -479,45 +755,174 @@ def get_translations():
         'cached': True
     }), 200
 
+@translations.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_translations():
+    user = current_user
+
+    data = request.json or {}
+    texts = data.get('texts')
+    source = data.get('source') or 'en'
+    target = data.get('target') or 'zh'
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': "Missing or empty 'texts' list"}), 400
+
+    max_items = app.config['TRANSLATE_BATCH_MAX']
+    if len(texts) > max_items:
+        return jsonify({'error': f'At most {max_items} texts per batch'}), 400
+
+    # dedupe but keep the order the client sent
+    keys = []
+    for raw in texts:
+        if not isinstance(raw, str):
+            continue
+        normalized = raw.strip()
+        if normalized and normalized not in keys:
+            keys.append(normalized)
+
+    if not keys:
+        return jsonify({'error': "Missing or empty 'texts' list"}), 400
+
+    results = {}
+    for key in keys:
+        hit, cached = translation_cache.lookup((key, source, target))
+        if not hit:
+            continue
+        # a negative entry: the upstream failed for this one recently, don't ask again yet
+        if cached is None:
+            results[key] = {'status': 'error', 'translation': None}
+        else:
+            results[key] = {'status': 'cached', 'translation': cached.translated_text}
+
+    # one round-trip for everything the in-process cache didn't have
+    pending = [k for k in keys if k not in results]
+    rows = []
+    if pending:
+        rows = Translation.query.filter(
+            Translation.text.in_(pending),
+            Translation.source_lang == source,
+            Translation.target_lang == target,
+        ).all()
+
+    for row in rows:
+        translation_cache.put((row.text, source, target), _cached_translation(row))
+        results[row.text] = {'status': 'cached', 'translation': row.translated_text}
+
+    misses = [k for k in keys if k not in results]
+    if misses:
+        # the process-wide pool, a big batch waits its turn instead of adding threads
+        fetched = translate_client.executor.map(
+            lambda k: upstream_flight.do(
+                (k, source, target), lambda: fetch_translation(k, source, target)
+            ),
+            misses,
+        )
+
+        new_rows = []
+        for key, translated in zip(misses, fetched):
+            if not translated:
+                translation_cache.put_negative((key, source, target))
+                results[key] = {'status': 'error', 'translation': None}
+                continue
+
+            new_rows.append({
+                'text': key,
+                'source_lang': source,
+                'target_lang': target,
+                'translated_text': translated,
+            })
+            translation_cache.put(
+                (key, source, target),
+                CachedTranslation(key, source, target, translated),
+            )
+            results[key] = {'status': 'fresh', 'translation': translated}
+
+        insert_ignore(Translation.__table__, new_rows)
+        db.session.commit()
+
+    return jsonify({
+        'source_lang': source,
+        'target_lang': target,
+        'results': results,
+    }), 200
+
 
 # ---Word Bank routes---
 word_bank = Blueprint('word_bank', __name__, url_prefix='/api')
 
+WORD_SORTS = {
+    # name -> (column, descending, type of the cursor value)
+    'id': (Word.id, False, int),
+    'lemma': (Word.lemma, False, str),
+    'rank': (Word.lemma_rank, False, int),
+    'seen': (user_word.c.number_of_times_seen, True, int),
+}
+
 @word_bank.route('/words', methods=['GET'])
 @jwt_required()
 def list_words():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
+    user = current_user
 
-    words_payload = []
-    for w in user.words:
-        t = Translation.query.filter_by(
-            text=w.lemma,
-            source_lang='en',
-            target_lang='zh'
-        ).first()
-        zh_text = t.translated_text if t else None
+    sort = request.args.get('sort', 'id')
+    if sort not in WORD_SORTS:
+        return jsonify({'error': f"sort must be one of {', '.join(WORD_SORTS)}"}), 400
+    column, descending, value_type = WORD_SORTS[sort]
+
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        limit = 100
+    limit = max(1, min(limit, 500))
+
+    query = word_bank_query(user.id)
+
+    # keyset pagination on (sort column, word id), cursors are [sort, value, id]
+    cursor = request.args.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor)
+        if not values or len(values) != 3 or values[0] != sort:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        _, last_value, last_id = values
+        valid_value = is_int(last_value) if value_type is int else isinstance(last_value, value_type)
+        if not valid_value or not is_int(last_id):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        after = column < last_value if descending else column > last_value
+        query = query.filter(db.or_(after, db.and_(column == last_value, Word.id > last_id)))
+
+    query = query.order_by(column.desc() if descending else column.asc(), Word.id.asc())
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_word, last_seen, _ = rows[-1]
+        last_value = {
+            'id': last_word.id,
+            'lemma': last_word.lemma,
+            'rank': last_word.lemma_rank,
+            'seen': last_seen,
+        }[sort]
+        next_cursor = encode_cursor([sort, last_value, last_word.id])
 
+    words_payload = []
+    for w, seen, zh_text in rows:
         words_payload.append({
             'id': w.id,
             'lemma': w.lemma,
             'lemma_rank': w.lemma_rank,
             'word_rank': w.word_rank,
+            'times_seen': seen,
             'translation': zh_text,
         })
 
-    return jsonify({'words': words_payload}), 200
+    return jsonify({'words': words_payload, 'next_cursor': next_cursor}), 200
 
 @word_bank.route('/words', methods=['POST'])
 @jwt_required()
 def add_word():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
+    user = current_user
+
     data = request.json or {}
     word_text = data.get('word')
 
@@ -529,63 +934,57 @@ def add_word():
         return jsonify({'error': 'Missing word parameter'}), 400
 
     existing_word = Word.query.filter_by(lemma=lemma).first()
-    if existing_word and existing_word in user.words:
+    if existing_word and user_has_word(user.id, existing_word.id):
         return jsonify({'error': 'Duplicate word'}), 409
 
     word = existing_word
     if not word:
-        word = Word(lemma=lemma, lemma_rank=0, word_rank=0)
-        db.session.add(word)
-        db.session.flush()
+        # lemma is unique, another request may be adding the same word right now
+        word_rank, lemma_rank = word_ranks(lemma)
+        insert_ignore(Word.__table__, [{'lemma': lemma, 'lemma_rank': lemma_rank, 'word_rank': word_rank}])
+        word = Word.query.filter_by(lemma=lemma).one()
 
     t = get_or_create_translation(lemma, source='en', target='zh')
     zh_text = t.translated_text if t else None
 
-    if word not in user.words:
-        user.words.append(word)
-        db.session.commit()
-        return jsonify({
-            'word': {
-                'id': word.id,
-                'lemma': word.lemma,
-                'translation': zh_text,
-            }
-        }), 201
-    
-    return jsonify({'error': 'Action declined'}), 500
+    insert_ignore(user_word, [{'user_id': user.id, 'word_id': word.id}])
+    db.session.commit()
+    return jsonify({
+        'word': {
+            'id': word.id,
+            'lemma': word.lemma,
+            'translation': zh_text,
+        }
+    }), 201
 
 @word_bank.route('/words/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_word(id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    word = Word.query.get(id)
-    if not word:
-        return jsonify({'error': 'Word not found'}), 404
-    
-    if word in user.words:
-        user.words.remove(word)
+    user = current_user
+
+    removed = db.session.execute(
+        user_word.delete().where(user_word.c.user_id == user.id, user_word.c.word_id == id)
+    ).rowcount
+    if removed:
         db.session.commit()
         return jsonify({'message': 'Word deleted'}), 200
-    
+
+    if not db.session.get(Word, id):
+        return jsonify({'error': 'Word not found'}), 404
     return jsonify({'error': 'Word not found in word bank'}), 404
 
 
 @word_bank.route('/words', methods=['DELETE'])
 @jwt_required()
 def clear_words():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    if not user.words:
+    user = current_user
+
+    removed = db.session.execute(
+        user_word.delete().where(user_word.c.user_id == user.id)
+    ).rowcount
+    if not removed:
         return jsonify({'error': 'Empty word bank'}), 400
-    
-    user.words = []
+
     db.session.commit()
     
     return jsonify({'message': 'Word bank cleared'}), 200
@@ -611,20 +1010,30 @@ def get_or_create_tag(name: str) -> Tag | None:
     db.session.flush()  # gets t.id without committing
     return t
 
+@dev.route('/translation-cache', methods=['GET'])
+@jwt_required()
+def translation_cache_stats():
+    return jsonify(translation_cache.stats()), 200
+
+@dev.route('/user-cache', methods=['GET'])
+@jwt_required()
+def user_cache_stats():
+    return jsonify(user_cache.stats()), 200
+
+@dev.route('/storage', methods=['GET'])
+@jwt_required()
+def storage_settings():
+    return jsonify(storage.describe()), 200
+
 @dev.route('/seed-articles', methods=['POST'])
 @jwt_required()
 def seed_articles():
-    raw_user_id = get_jwt_identity()
-    try:
-        user_id = int(raw_user_id)
-    except (TypeError, ValueError):
-        return jsonify({"error": "Invalid user id in token"}), 401
-
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"error": "Unauthorized"}), 401
+    user = current_user
 
-    if user.texts and len(user.texts) > 0:
+    already_seeded = db.session.execute(
+        db.select(db.exists().where(user_text.c.user_id == user.id))
+    ).scalar()
+    if already_seeded:
         return jsonify({"error": "Already seeded for this user"}), 409
 
     samples = [
@@ -650,7 +1059,6 @@ def seed_articles():
                 ),
                 url="https://example.com/routines",
                 authors="System",
-                difficulty=0.3,
             ),
             "tags": ["daily-life", "routine", "habits"]
         },
@@ -677,7 +1085,6 @@ def seed_articles():
                 ),
                 url="https://example.com/tokyo",
                 authors="System",
-                difficulty=0.5,
             ),
             "tags": ["travel", "japan", "story"]
         },
@@ -705,7 +1112,6 @@ def seed_articles():
                 ),
                 url="https://example.com/school",
                 authors="System",
-                difficulty=0.4,
             ),
             "tags": ["school", "writing", "study-skills"]
         },
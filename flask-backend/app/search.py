@@ -0,0 +1,313 @@
+import html
+import re
+
+from flask import current_app
+from sqlalchemy import event, inspect, text as sql
+from sqlalchemy.orm import Session
+
+from app.models import db, Text, text_tag_association, Tag
+
+# Full-text search over Text title, content and tags.
+#
+# Both backends keep a side table `text_fts` keyed by text id:
+#   - SQLite: an FTS5 virtual table, ranked with bm25()
+#   - Postgres: a plain table with a generated, weighted tsvector + GIN index
+# It is kept in sync from the ORM (see _sync_after_flush), bulk writers
+# call index_texts() themselves.
+
+FTS_TABLE = "text_fts"
+
+# marks put around hits by the database, swapped for <mark> after escaping
+HIT_START = "\x02"
+HIT_END = "\x03"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+POSTGRES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {FTS_TABLE} (
+        rowid INTEGER PRIMARY KEY,
+        title TEXT,
+        content TEXT,
+        tags TEXT,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+            to_tsvector('english', coalesce(content, ''))
+        ) STORED
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{FTS_TABLE}_document ON {FTS_TABLE} USING GIN (document)",
+]
+
+SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, tags, tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+
+class SearchBackend:
+    def __init__(self):
+        self.dialect = None
+
+    @property
+    def enabled(self):
+        return self.dialect in ("sqlite", "postgresql")
+
+    def init_app(self, app):
+        """Turns the backend on if the index can be used. Call inside an app context."""
+        dialect = db.engine.dialect.name
+        if dialect not in ("sqlite", "postgresql"):
+            self.dialect = None
+            return
+
+        if app.config["FAST_START"]:
+            # no DDL at boot, migrations.upgrade() creates the index
+            if inspect(db.engine).has_table(FTS_TABLE):
+                self.dialect = dialect
+            else:
+                self.dialect = None
+                app.logger.warning("no %s table, search falls back to LIKE until "
+                                   "`python -m tools.migrate upgrade` has run", FTS_TABLE)
+            return
+
+        if not inspect(db.engine).has_table(Text.__tablename__):
+            # schema not created yet (migrations turned off), nothing to index
+            self.dialect = None
+            return
+
+        self.ensure_index()
+
+    def ensure_index(self):
+        """Creates the index table if it's missing and fills it. Call inside an app context."""
+        dialect = db.engine.dialect.name
+        ddl = {"sqlite": SQLITE_DDL, "postgresql": POSTGRES_DDL}.get(dialect)
+        if ddl is None:
+            self.dialect = None
+            return
+
+        created = not inspect(db.engine).has_table(FTS_TABLE)
+        try:
+            with db.engine.begin() as conn:
+                for statement in ddl:
+                    conn.execute(sql(statement))
+        except Exception:
+            # e.g. SQLite built without FTS5, search falls back to LIKE
+            current_app.logger.warning("full-text search unavailable on %s", dialect, exc_info=True)
+            self.dialect = None
+            return
+
+        self.dialect = dialect
+        if created:
+            with db.engine.begin() as conn:
+                self.rebuild(conn)
+
+    # --- indexing ---
+
+    def index_texts(self, conn, rows):
+        """rows: iterable of (text_id, title, content, tags string)."""
+        if not self.enabled:
+            return
+        rows = [
+            {"rowid": rowid, "title": title or "", "content": content or "", "tags": tags or ""}
+            for rowid, title, content, tags in rows
+        ]
+        if not rows:
+            return
+
+        self.remove_texts(conn, [r["rowid"] for r in rows])
+        conn.execute(
+            sql(f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags) "
+                "VALUES (:rowid, :title, :content, :tags)"),
+            rows,
+        )
+
+    def remove_texts(self, conn, text_ids):
+        if not self.enabled or not text_ids:
+            return
+        conn.execute(
+            sql(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"),
+            [{"rowid": tid} for tid in text_ids],
+        )
+
+    def rebuild(self, conn, chunk_size=1000):
+        """Reindexes every Text. Returns the number of rows indexed."""
+        if not self.enabled:
+            return 0
+
+        conn.execute(sql(f"DELETE FROM {FTS_TABLE}"))
+        total = 0
+        last_id = 0
+        while True:
+            texts = conn.execute(
+                db.select(Text.id, Text.title, Text.content)
+                .where(Text.id > last_id)
+                .order_by(Text.id)
+                .limit(chunk_size)
+            ).all()
+            if not texts:
+                break
+            last_id = texts[-1].id
+
+            tags = tags_for(conn, [t.id for t in texts])
+            self.index_texts(conn, [
+                (t.id, t.title, t.content, tags.get(t.id, "")) for t in texts
+            ])
+            total += len(texts)
+
+        return total
+
+    # --- querying ---
+
+    def search(self, user_id, q="", title="", tag="", limit=20, after=None):
+        """
+        Relevance-ranked hits among the user's texts.
+        Returns a list of (text_id, score, snippet html), best first.
+        after: (score, text_id) of the last hit of the previous page.
+        """
+        if self.dialect == "sqlite":
+            return self._search_sqlite(user_id, q, title, tag, limit, after)
+        return self._search_postgres(user_id, q, title, tag, limit, after)
+
+    def _search_sqlite(self, user_id, q, title, tag, limit, after):
+        def terms(value):
+            return " ".join(f'"{tok}"*' for tok in TOKEN_RE.findall(value))
+
+        parts = []
+        if q:
+            parts.append(f"({terms(q)})")
+        if title:
+            parts.append(f"title : ({terms(title)})")
+        if tag:
+            parts.append(f"tags : ({terms(tag)})")
+        match = " AND ".join(p for p in parts if not p.endswith("()"))
+        if not match:
+            return []
+
+        # bm25 is "lower is better", keyset continues after (rank, id)
+        keyset = ""
+        params = {
+            "match": match, "user_id": user_id, "limit": limit,
+            "hit_start": HIT_START, "hit_end": HIT_END,
+        }
+        if after:
+            keyset = "WHERE rank > :after_rank OR (rank = :after_rank AND id < :after_id)"
+            params.update(after_rank=-after[0], after_id=after[1])
+
+        rows = db.session.execute(sql(f"""
+            SELECT * FROM (
+                SELECT {FTS_TABLE}.rowid AS id,
+                       bm25({FTS_TABLE}, 5.0, 1.0, 3.0) AS rank,
+                       snippet({FTS_TABLE}, 1, :hit_start, :hit_end, '…', 24) AS snippet
+                FROM {FTS_TABLE}
+                JOIN user_text ON user_text.text_id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH :match AND user_text.user_id = :user_id
+            )
+            {keyset}
+            ORDER BY rank, id DESC
+            LIMIT :limit
+        """), params).all()
+
+        # bm25 is "lower is better", flip it so bigger scores are better everywhere
+        return [(r.id, -r.rank, _highlight(r.snippet)) for r in rows]
+
+    def _search_postgres(self, user_id, q, title, tag, limit, after):
+        def terms(value, weight=""):
+            return [f"{tok}:*{weight}" for tok in TOKEN_RE.findall(value)]
+
+        query_terms = terms(q) + terms(title, "A") + terms(tag, "B")
+        if not query_terms:
+            return []
+
+        keyset = ""
+        params = {
+            "tsquery": " & ".join(query_terms),
+            "user_id": user_id,
+            "limit": limit,
+            "headline_opts": f"StartSel={HIT_START}, StopSel={HIT_END}, MaxWords=35, MinWords=15",
+        }
+        if after:
+            keyset = "WHERE rank < :after_rank OR (rank = :after_rank AND id < :after_id)"
+            params.update(after_rank=after[0], after_id=after[1])
+
+        # headline only for the rows on this page, it's the expensive part
+        rows = db.session.execute(sql(f"""
+            SELECT hits.id, hits.rank,
+                   ts_headline('english', f.content, to_tsquery('english', :tsquery),
+                               :headline_opts) AS snippet
+            FROM (
+                SELECT * FROM (
+                    SELECT f.rowid AS id, ts_rank(f.document, query) AS rank
+                    FROM {FTS_TABLE} f
+                    CROSS JOIN to_tsquery('english', :tsquery) AS query
+                    JOIN user_text ON user_text.text_id = f.rowid
+                    WHERE f.document @@ query AND user_text.user_id = :user_id
+                ) ranked
+                {keyset}
+                ORDER BY rank DESC, id DESC
+                LIMIT :limit
+            ) hits
+            JOIN {FTS_TABLE} f ON f.rowid = hits.id
+            ORDER BY hits.rank DESC, hits.id DESC
+        """), params).all()
+
+        return [(r.id, r.rank, _highlight(r.snippet)) for r in rows]
+
+
+def _highlight(snippet):
+    """Escapes the snippet and turns the hit marks into <mark> tags."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(HIT_START, "<mark>").replace(HIT_END, "</mark>")
+
+
+def plain_snippet(highlighted):
+    return html.unescape(highlighted.replace("<mark>", "").replace("</mark>", ""))
+
+
+def tags_for(conn, text_ids):
+    """text id -> space separated tag names, in one query."""
+    if not text_ids:
+        return {}
+    rows = conn.execute(
+        db.select(text_tag_association.c.text_id, Tag.name)
+        .join(Tag, Tag.id == text_tag_association.c.tag_id)
+        .where(text_tag_association.c.text_id.in_(text_ids))
+    ).all()
+
+    tags = {}
+    for text_id, name in rows:
+        tags.setdefault(text_id, []).append(name)
+    return {tid: " ".join(names) for tid, names in tags.items()}
+
+
+search_backend = SearchBackend()
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_after_flush(session, flush_context):
+    if not search_backend.enabled:
+        return
+
+    changed = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Text):
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(
+            state.attrs[name].history.has_changes() for name in ("title", "content", "tags")
+        ):
+            changed.append(obj)
+
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Text)]
+
+    if not changed and not removed:
+        return
+
+    conn = session.connection()
+    search_backend.remove_texts(conn, removed)
+    search_backend.index_texts(conn, [
+        (t.id, t.title, t.content, " ".join(tag.name for tag in t.tags)) for t in changed
+    ])
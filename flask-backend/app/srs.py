@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+# SM-2 style spaced repetition on top of user_word.
+# number_of_times_seen is the repetition count, ease/interval live
+# next to it and due_at decides what the quiz asks next.
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RETRY_AFTER = timedelta(minutes=10)
+
+
+def next_review(times_seen, ease, interval_days, correct, now=None):
+    """
+    Works out the schedule after one quiz answer.
+    times_seen is the count *before* this answer.
+    Returns a dict with ease, interval_days and due_at.
+    """
+    now = now or datetime.utcnow()
+    ease = ease or DEFAULT_EASE
+    interval_days = interval_days or 0.0
+
+    if not correct:
+        # forgot it: start the interval over and ask again soon
+        return {
+            "ease": max(MIN_EASE, ease - 0.2),
+            "interval_days": 0.0,
+            "due_at": now + RETRY_AFTER,
+        }
+
+    if times_seen == 0 or interval_days < 1:
+        interval_days = 1.0
+    elif interval_days < 6:
+        interval_days = 6.0
+    else:
+        interval_days = interval_days * ease
+
+    return {
+        "ease": ease + 0.1,
+        "interval_days": interval_days,
+        "due_at": now + timedelta(days=interval_days),
+    }
@@ -0,0 +1,52 @@
+from sqlalchemy import event
+
+from app.models import db
+
+# Per-connection setup for the storage profiles in app/config.py.
+#
+# The sqlite profile switches the file to WAL (readers no longer block the
+# writer and vice versa), relaxes fsync to once per checkpoint, and makes
+# writers wait for the lock instead of failing with "database is locked".
+# Pool settings for the postgres profile are plain engine options and
+# need nothing here.
+
+
+class Storage:
+    def __init__(self):
+        self.profile = None
+        self.pragmas = {}
+
+    def init_app(self, app):
+        """Call inside an app context, before the engine hands out connections."""
+        self.profile = app.config["DB_PROFILE"]
+        self.pragmas = app.config["SQLITE_PRAGMAS"] if self.profile == "sqlite" else {}
+
+        engine = db.engine
+        if self.pragmas and engine.dialect.name == "sqlite":
+            if engine.url.database in (None, "", ":memory:"):
+                # WAL and mmap mean nothing for an in-memory database
+                self.pragmas = {k: v for k, v in self.pragmas.items()
+                                if k not in ("journal_mode", "mmap_size")}
+            event.listen(engine, "connect", self._on_connect)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    def describe(self):
+        """Current settings as the database reports them, for diagnostics."""
+        if db.engine.dialect.name != "sqlite":
+            pool = db.engine.pool
+            return {"profile": self.profile, "pool": pool.status()}
+        with db.engine.connect() as conn:
+            return {
+                "profile": self.profile,
+                **{name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in self.pragmas},
+            }
+
+
+storage = Storage()
@@ -0,0 +1,69 @@
+import zlib
+
+from sqlalchemy.types import LargeBinary, String, TypeDecorator
+
+# Storage for Text.content.
+#
+# Bodies are stored as bytes: utf-8 as-is, or, when compression is on and
+# the body is at least TEXT_COMPRESS_MIN_BYTES long, MAGIC + zlib data.
+# The column type turns them back into str on the way out, for the ORM and
+# Core queries alike, so nothing else has to know. Rows written before this
+# (plain text columns) come back as str and are passed through untouched.
+#
+# Substring matching (the LIKE fallback in search) can't see inside
+# compressed bodies, full-text search keeps its own plain copy. Outside
+# SQLite the column is binary and the fallback only matches titles and
+# excerpts.
+
+MAGIC = b"\x00z"
+
+
+class ContentCodec:
+    def __init__(self, min_bytes=0, level=6):
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def init_app(self, app):
+        self.min_bytes = app.config["TEXT_COMPRESS_MIN_BYTES"]
+        self.level = app.config["TEXT_COMPRESS_LEVEL"]
+
+    def encode(self, value):
+        raw = value.encode("utf-8")
+        if self.min_bytes and len(raw) >= self.min_bytes:
+            packed = MAGIC + zlib.compress(raw, self.level)
+            if len(packed) < len(raw):
+                return packed
+        return raw
+
+    @staticmethod
+    def decode(value):
+        if isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value.startswith(MAGIC):
+            return zlib.decompress(value[len(MAGIC):]).decode("utf-8")
+        return value.decode("utf-8")
+
+
+content_codec = ContentCodec()
+
+
+class CompressedText(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def coerce_compared_value(self, op, value):
+        # LIKE patterns and the like are plain strings, not bodies to encode
+        if isinstance(value, str):
+            return String()
+        return self
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return content_codec.encode(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return content_codec.decode(value)
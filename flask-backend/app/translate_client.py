@@ -0,0 +1,238 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import metrics
+
+# requests (with urllib3 and certifi) is imported on the first call rather
+# than at boot, it's a good share of the app's import time and most
+# requests never reach the upstream.
+
+
+class CircuitBreaker:
+    """
+    Stops calling the upstream after too many failures in a row.
+    While open every call fails fast, after reset_timeout one trial
+    call is let through (half-open) and its result decides what's next.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # open, or half-open with the trial call still running
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of normal traffic, so a struggling
+    upstream doesn't get hit with 3x the load.
+    Every request adds `ratio` tokens, every retry spends one.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+
+        self._lock = threading.Lock()
+        self.tokens = max_tokens
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class _Retryable(Exception):
+    pass
+
+
+def _translated_text(data):
+    """The translation in a `dj=1` response body, None if it has an unexpected shape."""
+    if not isinstance(data, dict) or not isinstance(data.get("sentences", []), list):
+        return None
+    parts = [s.get("trans") for s in data.get("sentences", []) if isinstance(s, dict)]
+    translated = "".join(p for p in parts if isinstance(p, str)).strip()
+    return translated or None
+
+
+class TranslateClient:
+    """
+    Shared client for the translate upstream.
+    Keeps a keep-alive connection pool, retries with jitter inside a
+    budget and a total deadline, and fails fast while the breaker is open.
+    """
+
+    def __init__(self):
+        self.url = "https://translate.googleapis.com/translate_a/single"
+        self.timeout = 2.0
+        self.deadline = 5.0
+        self.max_attempts = 3
+        self.backoff = 0.1
+
+        self.pool_size = 20
+        self.workers = 8
+
+        self.breaker = CircuitBreaker()
+        self.budget = RetryBudget()
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._executor = None
+        self._executor_pid = None
+
+    def init_app(self, app):
+        self.url = app.config["TRANSLATE_URL"]
+        self.timeout = app.config["TRANSLATE_TIMEOUT"]
+        self.deadline = app.config["TRANSLATE_DEADLINE"]
+        self.max_attempts = app.config["TRANSLATE_MAX_ATTEMPTS"]
+
+        self.breaker = CircuitBreaker(
+            failure_threshold=app.config["TRANSLATE_BREAKER_THRESHOLD"],
+            reset_timeout=app.config["TRANSLATE_BREAKER_RESET"],
+        )
+        self.budget = RetryBudget(ratio=app.config["TRANSLATE_RETRY_RATIO"])
+        self.pool_size = app.config["TRANSLATE_POOL_SIZE"]
+        self.workers = app.config["TRANSLATE_WORKERS"]
+        self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+    @property
+    def session(self):
+        # made on first use, and again after a fork so workers don't share sockets
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._make_session(self.pool_size)
+                    self._pid = pid
+        return self._session
+
+    @property
+    def executor(self):
+        """
+        Worker threads for fanning out upstream calls, one pool per process
+        shared by every request, so TRANSLATE_WORKERS caps the whole process
+        rather than each request. Made on first use and again after a fork.
+        """
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="translate"
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    @staticmethod
+    def _make_session(pool_size):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def translate(self, text, source="en", target="zh"):
+        """Returns the translated text, or None if the upstream couldn't give one."""
+        import requests
+
+        if not self.breaker.allow():
+            metrics.breaker_rejected()
+            return None
+
+        params = {
+            "client": "gtx",
+            "sl": source,   # source language, e.g. 'en'
+            "tl": target,   # target language, e.g. 'zh'
+            "dt": ["t", "bd"],  # multiple dt params -> main text + dictionary
+            "dj": "1",
+            "q": text,
+        }
+
+        self.budget.deposit()
+        give_up_at = time.monotonic() + self.deadline
+
+        for attempt in range(self.max_attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(
+                    self.url, params=params, timeout=min(self.timeout, remaining)
+                )
+                metrics.observe_upstream(time.perf_counter() - started, resp.status_code)
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    raise _Retryable(resp.status_code)
+                resp.raise_for_status()
+                data = resp.json()
+            except (_Retryable, requests.ConnectionError, requests.Timeout) as e:
+                if not isinstance(e, _Retryable):
+                    outcome = "timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                    metrics.observe_upstream(time.perf_counter() - started, outcome)
+                if attempt + 1 >= self.max_attempts or not self.budget.withdraw():
+                    break
+                # full jitter so retries from many workers don't line up
+                pause = random.uniform(0, self.backoff * (2 ** attempt))
+                time.sleep(min(pause, max(0.0, give_up_at - time.monotonic())))
+                continue
+            except (requests.RequestException, ValueError):
+                # 4xx or a body we can't read, retrying won't help
+                # but the upstream itself is answering
+                self.breaker.record_success()
+                return None
+
+            # the upstream answered, even if the body turns out to be unusable
+            self.breaker.record_success()
+            return _translated_text(data)
+
+        self.breaker.record_failure()
+        return None
+
+
+translate_client = TranslateClient()
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# what the cache hands back instead of a Translation row, so nothing
+# session-bound is shared between requests
+CachedTranslation = namedtuple(
+    "CachedTranslation", ["text", "source_lang", "target_lang", "translated_text"]
+)
+
+
+class TranslationCache:
+    """
+    In-process LRU cache in front of the Translation table.
+    Keys are (normalized text, source, target).
+    A stored value of None is a negative entry (the upstream failed),
+    it lives for a shorter time so we retry soon but not on every hover.
+    """
+
+    def __init__(self, max_size=5000, ttl=3600, negative_ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.max_size = app.config["TRANSLATION_CACHE_SIZE"]
+        self.ttl = app.config["TRANSLATION_CACHE_TTL"]
+        self.negative_ttl = app.config["TRANSLATION_CACHE_NEGATIVE_TTL"]
+        self.clear()
+
+    def lookup(self, key):
+        """Returns (hit, value). value is None for a negative entry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        self._store(key, value, self.ttl)
+
+    def put_negative(self, key):
+        self._store(key, None, self.negative_ttl)
+
+    def _store(self, key, value, ttl):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers asking for the same key share one call.
+    The first caller runs fn, everyone who arrives while it is running
+    waits and gets the same result (or the same exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+translation_cache = TranslationCache()
+upstream_flight = SingleFlight()
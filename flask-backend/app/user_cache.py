@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models import db, User
+
+# The user behind the JWT, for flask_jwt_extended's user_lookup_loader.
+#
+# flask_jwt_extended already keeps the loaded user on `g` for the rest of
+# the request (that's what current_user reads), so this only has to make
+# the first lookup cheap: a few column values per user are kept for a short
+# TTL and turned back into a session-attached User without a query.
+# Any flush that touches a User drops its entry, other processes see the
+# change once the TTL runs out.
+
+SNAPSHOT_COLUMNS = ("id", "name", "password_hash", "quizzes_done")
+
+
+class UserCache:
+    def __init__(self, maxsize=1024, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config["USER_CACHE_SIZE"]
+        self.ttl = app.config["USER_CACHE_TTL"]
+        self.clear()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def load(self, user_id):
+        """Returns the User for an id in the current session, or None."""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        snapshot = self._get(user_id)
+        if snapshot is not None:
+            return self._attach(snapshot)
+
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self._put(user_id, {c: getattr(user, c) for c in SNAPSHOT_COLUMNS})
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _get(self, user_id):
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] <= now:
+                self._data.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def _put(self, user_id, snapshot):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    @staticmethod
+    def _attach(snapshot):
+        # same object a query would have produced, minus the query
+        key = User.__mapper__.identity_key_from_primary_key((snapshot["id"],))
+        existing = db.session.identity_map.get(key)
+        if existing is not None:
+            return existing
+
+        user = User.__mapper__.class_manager.new_instance()
+        for column, value in snapshot.items():
+            setattr(user, column, value)
+        make_transient_to_detached(user)
+        db.session.add(user)
+        return user
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_after_flush(session, flush_context):
+    changed = [
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    ]
+    if not changed:
+        return
+    for user_id in changed:
+        user_cache.invalidate(user_id)
+    # drop them again at commit, a concurrent request may have re-cached
+    # the old row between this flush and the commit
+    session.info.setdefault("user_cache_invalidate", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("user_cache_invalidate", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("user_cache_invalidate", None)
@@ -0,0 +1,144 @@
+"""
+Cold start time per boot mode: importing the app, create_app() and the first request.
+
+    python -m tools.bench_boot --runs 10
+    python -m tools.bench_boot --runs 20 --budget-ms 800 --imports 15
+
+Every run is a fresh interpreter. "development" is the default boot
+(.env, migrations, search index setup), "production" is APP_ENV=production,
+which starts fast (see FAST_START in app/config.py). With --budget-ms the
+exit status is 1 when the median production cold start is over budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "development": {"APP_ENV": "development"},
+    "production": {"APP_ENV": "production"},
+}
+
+
+def run_child():
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    resp = app.test_client().get("/health")
+    served = time.perf_counter()
+    assert resp.status_code == 200, resp.status_code
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "create_ms": (created - imported) * 1000,
+        "first_request_ms": (served - created) * 1000,
+        "requests_imported": "requests" in sys.modules,
+    }))
+
+
+def child_env(mode, database_url):
+    return {
+        **os.environ,
+        **MODES[mode],
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+    }
+
+
+def run_once(mode, database_url, importtime=False):
+    """Returns the child's numbers plus cold_ms, the whole process from exec to exit."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-m", "tools.bench_boot", "--child"]
+    started = time.perf_counter()
+    out = subprocess.run(command, env=child_env(mode, database_url), capture_output=True, text=True)
+    cold_ms = (time.perf_counter() - started) * 1000
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"{mode} boot failed")
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["cold_ms"] = cold_ms
+    return result, out.stderr
+
+
+def slowest_imports(stderr, n):
+    """Top n modules by cumulative import time from -X importtime output, two levels deep."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # one space before a top level import, two more per level below it
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), "  " * depth + name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Boots per mode.")
+    parser.add_argument("--database-url", help="Database to boot against, a temporary SQLite file by default.")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the median production cold start is above this.")
+    parser.add_argument("--imports", type=int, default=0, help="Also list the N slowest imports in production mode.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    tmp = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmp.name, 'boot.db')}"
+    # production mode expects a migrated schema, one development boot sets it up
+    run_once("development", database_url)
+
+    results = {mode: [] for mode in MODES}
+    for _ in range(args.runs):
+        # interleaved, so a noisy moment doesn't land on one mode only
+        for mode in MODES:
+            results[mode].append(run_once(mode, database_url)[0])
+
+    fields = ("cold_ms", "import_ms", "create_ms", "first_request_ms")
+    summary = {
+        mode: {
+            **{f"{field[:-3]}_median_ms": statistics.median(r[field] for r in runs) for field in fields},
+            **{f"{field[:-3]}_max_ms": max(r[field] for r in runs) for field in fields},
+            "requests_imported": any(r["requests_imported"] for r in runs),
+        }
+        for mode, runs in results.items()
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{args.runs} boots per mode, median (max) in ms")
+        print(f"{'mode':<12} " + " ".join(f"{f[:-3]:>18}" for f in fields) + "  requests imported")
+        for mode, s in summary.items():
+            cells = " ".join(
+                f"{s[f[:-3] + '_median_ms']:>9.0f} ({s[f[:-3] + '_max_ms']:>6.0f})" for f in fields
+            )
+            print(f"{mode:<12} {cells}  {'yes' if s['requests_imported'] else 'no'}")
+
+    if args.imports:
+        _, stderr = run_once("production", database_url, importtime=True)
+        print("slowest imports, production mode")
+        for us, name in slowest_imports(stderr, args.imports):
+            print(f"{us / 1000:>8.1f} ms  {name}")
+
+    if args.budget_ms is not None:
+        median = summary["production"]["cold_median_ms"]
+        if median > args.budget_ms:
+            raise SystemExit(f"production cold start {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        print(f"production cold start {median:.0f} ms, within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Serialization time and bytes on the wire for the heaviest endpoints,
+stdlib json vs orjson and identity vs gzip vs brotli.
+
+    python -m tools.bench_responses --words 500 --paragraphs 200 --repeat 200
+
+Runs against a throwaway SQLite database, nothing else needs to be running.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def setup_env(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["JWT_COOKIE_CSRF_PROTECT"] = "False"
+    # measured separately below
+    os.environ["COMPRESS_RESPONSES"] = "False"
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+
+def seed(app, words, paragraphs):
+    from app.models import db, User, Word, Text, Translation, user_word, user_text
+
+    vocab = [f"word{i}" for i in range(words)]
+    sentence = lambda: " ".join(random.choices(vocab, k=random.randint(6, 18))).capitalize() + "."
+
+    with app.app_context():
+        user = User(name="bench", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+
+        db.session.execute(Word.__table__.insert(), [
+            {"lemma": w, "lemma_rank": i + 1, "word_rank": i + 1} for i, w in enumerate(vocab)
+        ])
+        db.session.execute(Translation.__table__.insert(), [
+            {"text": w, "source_lang": "en", "target_lang": "zh", "translated_text": f"词{i}"}
+            for i, w in enumerate(vocab)
+        ])
+        word_ids = db.session.execute(db.select(Word.id)).scalars().all()
+        db.session.execute(user_word.insert(), [
+            {"user_id": user.id, "word_id": wid, "number_of_times_seen": random.randint(0, 9)}
+            for wid in word_ids
+        ])
+
+        texts = [
+            Text(
+                title=f"Article {i}",
+                content="\n\n".join(
+                    " ".join(sentence() for _ in range(5)) for _ in range(paragraphs if i == 0 else 5)
+                ),
+            )
+            for i in range(50)
+        ]
+        db.session.add_all(texts)
+        db.session.flush()
+        db.session.execute(user_text.insert(), [{"user_id": user.id, "text_id": t.id} for t in texts])
+        db.session.commit()
+        return user.id, texts[0].id
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=500, help="Word bank size.")
+    parser.add_argument("--paragraphs", type=int, default=200, help="Paragraphs in the long article.")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement.")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    setup_env(os.path.join(tmp.name, "bench.db"))
+
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from app.compression import brotli, compressor
+    from app.json_provider import OrjsonProvider, orjson
+
+    app = create_app()
+    user_id, article_id = seed(app, args.words, args.paragraphs)
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+    endpoints = [
+        f"/api/words?limit={args.words}",
+        f"/api/articles/{article_id}",
+        "/api/articles/search?limit=50",
+    ]
+
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    client = app.test_client()
+
+    print(f"{'endpoint':<34} {'provider':<8} {'dumps us':>9} {'identity':>9} "
+          + " ".join(f"{e:>9}" for e in encodings) + " " + " ".join(f"{e + ' us':>9}" for e in encodings))
+    for url in endpoints:
+        payload = client.get(url, headers=headers).get_json()
+        for name, provider in providers.items():
+            body = provider.dumps(payload).encode("utf-8")
+            sizes = [len(compressor.compress(body, e)) for e in encodings]
+            compress_us = [timed(lambda e=e: compressor.compress(body, e), args.repeat) for e in encodings]
+            dump_us = timed(lambda: provider.dumps(payload), args.repeat)
+            print(f"{url:<34} {name:<8} {dump_us:>9.0f} {len(body):>9} "
+                  + " ".join(f"{s:>9}" for s in sizes) + " "
+                  + " ".join(f"{us:>9.0f}" for us in compress_us))
+
+    if orjson is None:
+        print("orjson is not installed, only the stdlib provider was measured")
+    if brotli is None:
+        print("brotli is not installed, only gzip was measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Concurrent write throughput per storage profile.
+
+    python -m tools.bench_storage --threads 8 --seconds 10
+    python -m tools.bench_storage --postgres postgresql://localhost/enlingo_bench
+
+Every thread is its own user hammering POST /api/articles/<id>/reading-time
+(log insert + aggregate upserts + commit), with a GET /api/users/me read
+between writes. Each profile runs in a fresh process on a fresh database.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_child(args):
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from app.models import db, User, Text, user_text
+
+    app = create_app()
+    with app.app_context():
+        users = [User(name=f"bench{i}", password_hash="x") for i in range(args.threads)]
+        text = Text(title="Bench", content="A short text to read. " * 20)
+        db.session.add_all(users + [text])
+        db.session.flush()
+        db.session.execute(user_text.insert(), [{"user_id": u.id, "text_id": text.id} for u in users])
+        db.session.commit()
+        tokens = [create_access_token(identity=str(u.id)) for u in users]
+        text_id = text.id
+        profile = app.config["DB_PROFILE"]
+
+    writes = [0] * args.threads
+    errors = [0] * args.threads
+    latencies = [[] for _ in range(args.threads)]
+    stop = time.perf_counter() + args.seconds
+
+    def worker(i):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {tokens[i]}"}
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            resp = client.post(f"/api/articles/{text_id}/reading-time",
+                               headers=headers, json={"elapsed_time_seconds": 5})
+            latencies[i].append(time.perf_counter() - started)
+            if resp.status_code == 200:
+                writes[i] += 1
+            else:
+                errors[i] += 1
+            client.get("/api/users/me", headers=headers)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = sorted(x for per_thread in latencies for x in per_thread)
+
+    def pct(p):
+        if not all_latencies:
+            return 0.0
+        return all_latencies[min(len(all_latencies) - 1, int(p / 100 * len(all_latencies)))] * 1000
+
+    print(json.dumps({
+        "profile": profile,
+        "writes": sum(writes),
+        "errors": sum(errors),
+        "writes_per_s": sum(writes) / elapsed,
+        "p50_ms": pct(50),
+        "p99_ms": pct(99),
+    }))
+
+
+def run_profile(profile, url, args):
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "DB_PROFILE": profile,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "READING_LOG_WRITE_BEHIND": "False",
+        "USER_CACHE_TTL": "0",
+    }
+    out = subprocess.run(
+        [sys.executable, "-m", "tools.bench_storage", "--child",
+         "--threads", str(args.threads), "--seconds", str(args.seconds)],
+        env=env, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"{profile} run failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--postgres", help="Also run the postgres profile against this (empty) database.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("none", "sqlite"):
+            url = f"sqlite:///{os.path.join(tmp, profile + '.db')}"
+            runs.append(run_profile(profile, url, args))
+    if args.postgres:
+        runs.append(run_profile("postgres", args.postgres, args))
+
+    print(f"{args.threads} threads, {args.seconds:g}s each")
+    print(f"{'profile':<10} {'writes':>8} {'errors':>7} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in runs:
+        print(f"{r['profile']:<10} {r['writes']:>8} {r['errors']:>7} {r['writes_per_s']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Load test suite, see __main__.py.
+
+    python -m tools.loadtest --help
+"""
@@ -0,0 +1,221 @@
+"""
+Load test: generated data, replayed traffic, per-route latency and query counts.
+
+    python -m tools.loadtest --preset small --mix mixed --threads 8 --duration 30
+    python -m tools.loadtest --preset small --db /tmp/lt.db --save-baseline tools/loadtest/baseline.json
+    python -m tools.loadtest --preset small --db /tmp/lt.db --baseline tools/loadtest/baseline.json
+
+Builds the app with create_app() against a generated dataset (see
+dataset.py for the presets) and a local stub translator, then runs
+--threads virtual users through the app's test client. With --baseline
+the exit status is 1 when a route got slower or runs more queries.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from tools.loadtest.dataset import PRESETS
+from tools.loadtest.report import load_baseline, print_table, regressions, save_baseline, summarize
+from tools.loadtest.scenarios import ACTIONS, MIXES
+from tools.stub_translate import start_stub
+
+
+class Probe(threading.local):
+    """What the current thread's request did: its route and how many statements it ran."""
+
+    def __init__(self):
+        self.route = None
+        self.queries = 0
+
+    def install(self, app, engine):
+        from flask import request
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(*_):
+            self.queries += 1
+
+        @app.after_request
+        def remember_route(response):
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            self.route = f"{request.method} {rule}"
+            return response
+
+
+class Workload:
+    """The slice of the dataset the virtual users work with."""
+
+    def __init__(self, active_users, rng):
+        from app.models import db, User, Word, user_text
+
+        self.common = db.session.execute(
+            db.select(Word.lemma).order_by(Word.word_rank).limit(5_000)
+        ).scalars().all()
+        self.weights = [1.0 / rank for rank in range(1, len(self.common) + 1)]
+
+        user_ids = db.session.execute(db.select(User.id)).scalars().all()
+        picked = rng.sample(user_ids, min(active_users, len(user_ids)))
+        names = dict(db.session.execute(db.select(User.id, User.name).where(User.id.in_(picked))).all())
+        libraries = {uid: [] for uid in picked}
+        for uid, tid in db.session.execute(
+            db.select(user_text.c.user_id, user_text.c.text_id).where(user_text.c.user_id.in_(picked))
+        ):
+            libraries[uid].append(tid)
+        self.users = [(uid, names[uid], libraries[uid]) for uid in picked]
+
+    def common_word(self, rng):
+        return rng.choices(self.common, weights=self.weights)[0]
+
+
+class VirtualUser:
+    def __init__(self, client, probe, samples, workload, user, token, rng):
+        self.client = client
+        self.probe = probe
+        self.samples = samples
+        self.workload = workload
+        self.id, self.name, self.library = user
+        self.token = token
+        self.rng = rng
+        self.current = None
+
+    def call(self, method, url, auth=True, **kwargs):
+        headers = {"Authorization": f"Bearer {self.token}"} if auth else {}
+        self.probe.route = None
+        self.probe.queries = 0
+        started = time.perf_counter()
+        resp = getattr(self.client, method)(url, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.samples.append((started, self.probe.route or url, resp.status_code, elapsed, self.probe.queries))
+        return resp
+
+
+def setup_env(database_url, translate_url):
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["TRANSLATE_URL"] = translate_url
+    os.environ.setdefault("SECRET_KEY", "loadtest")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="tiny")
+    for size in ("users", "texts", "words", "logs"):
+        parser.add_argument(f"--{size}", type=int, help=f"Override the preset's number of {size}.")
+    parser.add_argument("--texts-per-user", type=int, default=20)
+    parser.add_argument("--words-per-user", type=int, default=50)
+    parser.add_argument("--text-words", type=int, default=250, help="Words per generated article.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, help="Processes for article stats while generating.")
+    parser.add_argument("--db", help="SQLite file to keep the data in; reused if it already has users.")
+    parser.add_argument("--database-url", help="Any other database, e.g. postgresql://localhost/enlingo_lt.")
+
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to measure.")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds to run before measuring.")
+    parser.add_argument("--active-users", type=int, default=200, help="Users the threads take turns being.")
+    parser.add_argument("--upstream-latency", type=int, default=30, help="Stub translator latency in ms.")
+    parser.add_argument("--upstream-jitter", type=int, default=20)
+    parser.add_argument("--upstream-fail-rate", type=float, default=0.0)
+
+    parser.add_argument("--baseline", help="Fail on regressions against this file.")
+    parser.add_argument("--save-baseline", help="Write this run's numbers here.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 slowdown, 0.25 = 25%%.")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="p95 slowdowns below this never fail.")
+    parser.add_argument("--error-slack", type=float, default=0.01,
+                        help="Allowed rise in the share of 5xx responses, 0.01 = one point.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    sizes = dict(PRESETS[args.preset])
+    for size in ("users", "texts", "words", "logs"):
+        if getattr(args, size) is not None:
+            sizes[size] = getattr(args, size)
+    sizes.update(texts_per_user=args.texts_per_user, words_per_user=args.words_per_user,
+                 text_words=args.text_words)
+
+    stub, translate_url = start_stub(
+        latency_ms=args.upstream_latency, jitter_ms=args.upstream_jitter, fail_rate=args.upstream_fail_rate,
+    )
+    tmp = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.abspath(args.db or os.path.join(tmp.name, 'lt.db'))}"
+    setup_env(database_url, translate_url)
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from app.log_buffer import reading_log_buffer
+    from app.models import db, User
+    from tools.loadtest.dataset import generate
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        if db.session.execute(db.select(User.id).limit(1)).first() is None:
+            started = time.perf_counter()
+            generate(sizes, seed=args.seed, workers=args.workers)
+            print(f"generated {args.preset} dataset in {time.perf_counter() - started:.0f}s")
+        else:
+            print(f"reusing the data already in {database_url}")
+        workload = Workload(args.active_users, rng)
+        tokens = {uid: create_access_token(identity=str(uid)) for uid, _, _ in workload.users}
+        probe = Probe()
+        probe.install(app, db.engine)
+
+    weights = MIXES[args.mix]
+    actions = [ACTIONS[name] for name in weights]
+    samples = []
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    stop = measure_from + args.duration
+
+    def worker(i):
+        thread_rng = random.Random(args.seed * 1000 + i)
+        client = app.test_client()
+        users = [
+            VirtualUser(client, probe, samples, workload, user, tokens[user[0]], thread_rng)
+            for user in workload.users[i::args.threads]
+        ]
+        while users and time.perf_counter() < stop:
+            vu = thread_rng.choice(users)
+            thread_rng.choices(actions, weights=list(weights.values()))[0](vu)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    reading_log_buffer.flush()
+    stub.shutdown()
+
+    measured = [s[1:] for s in samples if s[0] >= measure_from]
+    routes = summarize(measured, args.duration)
+    total = sum(r["requests"] for r in routes.values())
+
+    if args.json:
+        print(json.dumps(routes, indent=2))
+    else:
+        print(f"{args.preset} dataset, {args.mix} mix, {args.threads} threads, "
+              f"{total} requests in {args.duration:g}s ({total / args.duration:.0f}/s)")
+        print_table(routes)
+
+    workload_key = {"sizes": sizes, "seed": args.seed, "mix": args.mix, "threads": args.threads}
+    if args.save_baseline:
+        save_baseline(args.save_baseline, workload_key, routes)
+        print(f"baseline written to {args.save_baseline}")
+    if args.baseline:
+        problems = regressions(load_baseline(args.baseline), workload_key, routes,
+                               tolerance=args.tolerance, slack_ms=args.slack_ms,
+                               error_slack=args.error_slack)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            raise SystemExit(1)
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import random
+from datetime import datetime, timedelta
+
+# Synthetic data for the load test, written straight through Core in
+# chunks so the large preset fits in memory and finishes in minutes.
+# Everything is derived from one seed, the same sizes give the same rows.
+# The app is imported inside generate(), its config is read from the
+# environment on import and the runner has to set that up first.
+
+PRESETS = {
+    "tiny": {"users": 50, "texts": 500, "words": 2_000, "logs": 5_000},
+    "small": {"users": 1_000, "texts": 10_000, "words": 20_000, "logs": 100_000},
+    "large": {"users": 10_000, "texts": 100_000, "words": 200_000, "logs": 1_000_000},
+}
+
+PASSWORD = "loadtest-password"
+TAGS = ["news", "travel", "science", "sport", "culture", "tech", "health", "food",
+        "history", "business", "music", "nature"]
+
+SYLLABLES = ["ba", "ko", "ri", "te", "mu", "sa", "lo", "ne", "pi", "du", "ga", "vo",
+             "zi", "he", "fa", "ju"]
+
+CHUNK = 5_000
+
+
+def lemma(i):
+    """Word number i, made-up but pronounceable, unique per i."""
+    parts = []
+    i += len(SYLLABLES)  # at least two syllables
+    while i:
+        i, r = divmod(i, len(SYLLABLES))
+        parts.append(SYLLABLES[r])
+    return "".join(reversed(parts))
+
+
+def zipf_weights(n):
+    """Cumulative weights for picking word ranks roughly the way real text does."""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+    return cumulative
+
+
+def make_content(rng, vocab, weights, n_words):
+    words = rng.choices(vocab, cum_weights=weights, k=n_words)
+    sentences = []
+    i = 0
+    while i < len(words):
+        n = rng.randint(6, 18)
+        sentences.append(" ".join(words[i:i + n]).capitalize() + ".")
+        i += n
+    paragraphs = [" ".join(sentences[j:j + 5]) for j in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs)
+
+
+def generate(sizes, seed=1, workers=None, log=print):
+    """
+    Fills an empty database, call inside an app context.
+    sizes: users, texts, words, logs, texts_per_user, words_per_user, text_words.
+    """
+    from flask import current_app
+
+    from app.analytics import make_pool
+    from app.importer import TagResolver, chunked, insert_chunk
+    from app.models import db, Log, Translation, User, Word, user_text, user_word
+    from app.passwords import hash_password
+    from app.reading import rebuild_aggregates
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    # words, each with a cached translation in the stub's format
+    vocab = [lemma(i) for i in range(sizes["words"])]
+    for chunk in chunked(enumerate(vocab), CHUNK):
+        db.session.execute(Word.__table__.insert(), [
+            {"lemma": w, "lemma_rank": i + 1, "word_rank": i + 1} for i, w in chunk
+        ])
+        db.session.execute(Translation.__table__.insert(), [
+            {"text": w, "source_lang": "en", "target_lang": "zh", "translated_text": f"[zh] {w}",
+             "created_at": now} for _, w in chunk
+        ])
+    db.session.commit()
+    word_ids = db.session.execute(db.select(Word.id).order_by(Word.id)).scalars().all()
+    log(f"{len(vocab)} words and translations")
+
+    # one hash shared by every user, hashing 10k passwords would take longer than the test
+    password_hash = hash_password(PASSWORD, current_app.config["PASSWORD_HASH_METHOD"])
+    for chunk in chunked(range(sizes["users"]), CHUNK):
+        db.session.execute(User.__table__.insert(), [
+            {"name": f"user{i}", "password_hash": password_hash, "quizzes_done": 0} for i in chunk
+        ])
+    db.session.commit()
+    user_ids = db.session.execute(db.select(User.id).order_by(User.id)).scalars().all()
+    log(f"{len(user_ids)} users")
+
+    # texts go through the importer, which fills stats, tags and the search index
+    common = vocab[:5_000]
+    weights = zipf_weights(len(common))
+    text_ids = []
+    tags = TagResolver()
+    with make_pool(workers) as pool:
+        for chunk in chunked(range(sizes["texts"]), 1_000):
+            records = []
+            for i in chunk:
+                values = {
+                    "title": " ".join(rng.choices(common[:500], k=rng.randint(2, 6))).title(),
+                    "url": f"https://example.com/articles/{i}",
+                    "authors": f"Author {rng.randint(1, 500)}",
+                    "date": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                    "content": make_content(rng, common, weights, sizes["text_words"]),
+                }
+                records.append((values, rng.sample(TAGS, rng.randint(1, 3))))
+            text_ids += insert_chunk(records, tags, pool=pool)
+            db.session.commit()
+            log(f"{len(text_ids)} texts")
+
+    # per-user libraries, word banks and reading history
+    libraries = {}
+    links = []
+    for user_id in user_ids:
+        libraries[user_id] = rng.sample(text_ids, min(sizes["texts_per_user"], len(text_ids)))
+        links += [{"user_id": user_id, "text_id": t} for t in libraries[user_id]]
+    for chunk in chunked(links, CHUNK):
+        db.session.execute(user_text.insert(), chunk)
+    db.session.commit()
+
+    def bank():
+        for user_id in user_ids:
+            for word_id in rng.sample(word_ids, min(sizes["words_per_user"], len(word_ids))):
+                yield {
+                    "user_id": user_id,
+                    "word_id": word_id,
+                    "number_of_times_seen": rng.randint(0, 8),
+                    # a third of each bank is due for review
+                    "due_at": now + timedelta(days=rng.uniform(-10, 20)),
+                    "ease": 2.5,
+                    "interval_days": rng.choice([0.0, 1.0, 3.0, 7.0]),
+                }
+
+    banked = 0
+    for chunk in chunked(bank(), CHUNK * 4):
+        db.session.execute(user_word.insert(), chunk)
+        banked += len(chunk)
+    db.session.commit()
+    log(f"{len(links)} library entries, {banked} word bank entries")
+
+    def logs():
+        for _ in range(sizes["logs"]):
+            user_id = rng.choice(user_ids)
+            yield {
+                "user_id": user_id,
+                "text_id": rng.choice(libraries[user_id]) if libraries[user_id] else None,
+                "elapsed_time_seconds": rng.randint(30, 1800),
+                "date": now - timedelta(minutes=rng.randint(0, 90 * 24 * 60)),
+            }
+
+    for chunk in chunked(logs(), CHUNK * 4):
+        db.session.execute(Log.__table__.insert(), chunk)
+    rebuild_aggregates()
+    db.session.commit()
+    log(f"{sizes['logs']} reading logs")
@@ -0,0 +1,87 @@
+import json
+
+# Per-route summaries and the baseline check.
+#
+# Queries per request are the stable signal, the same code on the same
+# data runs the same statements, so any increase fails. Latency depends
+# on the machine, a route fails only when its p95 is both `tolerance`
+# slower than the baseline and at least `slack_ms` slower in absolute
+# terms, so fast routes don't flap on noise. Server errors (including
+# deliberate 503s under load) fail once their share goes more than
+# `error_slack` above the baseline's.
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def summarize(samples, elapsed):
+    """samples: (route, status, seconds, queries). Returns {route: summary}."""
+    by_route = {}
+    for route, status, seconds, queries in samples:
+        by_route.setdefault(route, []).append((status, seconds, queries))
+
+    routes = {}
+    for route, rows in sorted(by_route.items()):
+        latencies = sorted(s for _, s, _ in rows)
+        queries = [q for _, _, q in rows]
+        routes[route] = {
+            "requests": len(rows),
+            "per_s": len(rows) / elapsed if elapsed else 0.0,
+            "errors": sum(1 for status, _, _ in rows if status >= 500),
+            "client_errors": sum(1 for status, _, _ in rows if 400 <= status < 500),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "queries": sum(queries) / len(queries),
+            "max_queries": max(queries),
+        }
+    return routes
+
+
+def print_table(routes):
+    print(f"{'route':<44} {'reqs':>6} {'req/s':>7} {'5xx':>5} {'4xx':>5} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6} {'q max':>6}")
+    for route, r in routes.items():
+        print(f"{route:<44} {r['requests']:>6} {r['per_s']:>7.1f} {r['errors']:>5} "
+              f"{r['client_errors']:>5} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['queries']:>6.1f} {r['max_queries']:>6}")
+
+
+def save_baseline(path, workload, routes):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"workload": workload, "routes": routes}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def regressions(baseline, workload, routes, tolerance=0.25, slack_ms=2.0, query_slack=0.5,
+                error_slack=0.01):
+    """Returns a list of human readable problems, empty when the run is as good as the baseline."""
+    if baseline["workload"] != workload:
+        return [f"baseline was recorded with a different workload: {baseline['workload']}"]
+
+    problems = []
+    for route, r in routes.items():
+        base = baseline["routes"].get(route)
+        if base is None:
+            if r["errors"]:
+                problems.append(f"{route}: {r['errors']} server errors")
+            continue
+
+        error_rate = r["errors"] / r["requests"]
+        base_rate = base["errors"] / base["requests"]
+        if error_rate > base_rate + error_slack:
+            problems.append(f"{route}: {error_rate:.1%} server errors, baseline {base_rate:.1%}")
+        if r["queries"] > base["queries"] + query_slack:
+            problems.append(f"{route}: {r['queries']:.1f} queries per request, baseline {base['queries']:.1f}")
+        limit = max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + slack_ms)
+        if r["p95_ms"] > limit:
+            problems.append(f"{route}: p95 {r['p95_ms']:.1f} ms, baseline {base['p95_ms']:.1f} ms")
+    return problems
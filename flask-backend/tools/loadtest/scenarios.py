@@ -0,0 +1,107 @@
+import itertools
+
+from tools.loadtest.dataset import PASSWORD, TAGS
+
+# What a virtual user does. Each action is one step of a session (some
+# are two requests, like a quiz and its submission); a mix is a set of
+# weights over them, roughly matching what the frontend sends.
+
+MIXES = {
+    "mixed": {
+        "login": 2, "bootstrap": 6, "read": 20, "reading_time": 12, "hover": 30,
+        "batch_translate": 4, "quiz": 8, "search": 12, "add_word": 3, "words": 3,
+    },
+    "reader": {"bootstrap": 5, "read": 40, "reading_time": 25, "hover": 30},
+    "quiz": {"quiz": 70, "words": 20, "add_word": 10},
+    "search": {"search": 80, "read": 20},
+    "login": {"login": 100},
+}
+
+# words nobody has looked up yet, so hover and add_word reach the upstream
+_new_words = itertools.count()
+
+
+def new_word():
+    return f"zzq{next(_new_words)}"
+
+
+def login(vu):
+    resp = vu.call("post", "/api/auth/login", json={"name": vu.name, "password": PASSWORD}, auth=False)
+    if resp.status_code == 200:
+        vu.token = resp.get_json()["token"]
+
+
+def bootstrap(vu):
+    vu.call("get", "/api/users/bootstrap")
+
+
+def read(vu):
+    if vu.library:
+        vu.current = vu.rng.choice(vu.library)
+        vu.call("get", f"/api/articles/{vu.current}")
+
+
+def reading_time(vu):
+    if vu.current:
+        vu.call("post", f"/api/articles/{vu.current}/reading-time",
+                json={"elapsed_time_seconds": vu.rng.randint(20, 600)})
+
+
+def hover(vu):
+    # mostly words that are already translated, some that aren't
+    word = new_word() if vu.rng.random() < 0.1 else vu.workload.common_word(vu.rng)
+    vu.call("get", "/api/translations", query_string={"text": word})
+
+
+def batch_translate(vu):
+    words = [vu.workload.common_word(vu.rng) for _ in range(vu.rng.randint(10, 40))]
+    words.append(new_word())
+    vu.call("post", "/api/translations/batch", json={"texts": words})
+
+
+def quiz(vu):
+    resp = vu.call("get", "/api/quizzes/wordbank", query_string={"limit": 10})
+    if resp.status_code != 200:
+        return
+    answers = []
+    for q in resp.get_json()["questions"]:
+        # translations are "[zh] <lemma>", answer right most of the time
+        right = q["zh"].removeprefix("[zh] ")
+        answers.append({"id": q["id"], "answer": right if vu.rng.random() < 0.7 else "wrong"})
+    vu.call("post", "/api/quizzes/wordbank/submit", json={"answers": answers})
+
+
+def search(vu):
+    roll = vu.rng.random()
+    if roll < 0.4:
+        params = {"q": vu.workload.common_word(vu.rng)}
+    elif roll < 0.6:
+        params = {"tag": vu.rng.choice(TAGS)}
+    elif roll < 0.7:
+        params = {"title": vu.workload.common_word(vu.rng)}
+    else:
+        params = {}
+    vu.call("get", "/api/articles/search", query_string={**params, "limit": 20})
+
+
+def add_word(vu):
+    word = new_word() if vu.rng.random() < 0.5 else vu.workload.common_word(vu.rng)
+    vu.call("post", "/api/words", json={"word": word})
+
+
+def words(vu):
+    vu.call("get", "/api/words", query_string={"limit": 100})
+
+
+ACTIONS = {
+    "login": login,
+    "bootstrap": bootstrap,
+    "read": read,
+    "reading_time": reading_time,
+    "hover": hover,
+    "batch_translate": batch_translate,
+    "quiz": quiz,
+    "search": search,
+    "add_word": add_word,
+    "words": words,
+}
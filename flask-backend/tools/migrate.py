@@ -0,0 +1,39 @@
+"""
+Database schema migrations, see app/migrations.py.
+
+    python -m tools.migrate status
+    python -m tools.migrate upgrade
+
+Works in production too, where the app itself refuses to start on an
+out-of-date schema.
+"""
+import sys
+
+from app import create_app
+from app.migrations import HEAD, current_version, pending, upgrade
+from app.models import db
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "status"
+    if command not in ("status", "upgrade"):
+        raise SystemExit("usage: python -m tools.migrate [status|upgrade]")
+
+    app = create_app({"AUTO_MIGRATE": False, "SCHEMA_CHECK": False, "FAST_START": False})
+    with app.app_context():
+        if command == "upgrade":
+            if not upgrade():
+                print(f"already at version {HEAD}")
+            return
+
+        with db.engine.connect() as conn:
+            version = current_version(conn)
+            todo = pending(conn)
+        print(f"version {version or 0}, latest {HEAD}")
+        for v, description, _ in todo:
+            print(f"  pending {v}: {description}")
+
+
+if __name__ == "__main__":
+    main()
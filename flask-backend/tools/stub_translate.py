@@ -0,0 +1,104 @@
+"""
+Local stand-in for translate.googleapis.com so the translation client
+can be exercised offline.
+
+    python -m tools.stub_translate --port 5055 --latency 200 --fail-rate 0.1
+    TRANSLATE_URL=http://127.0.0.1:5055/translate_a/single python run.py
+
+Answers in the same dj=1 shape as the real endpoint, with the "translation"
+being the input text prefixed by the target language.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubSettings:
+    def __init__(self, latency_ms=0, jitter_ms=0, fail_rate=0.0, fail_status=503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    settings = StubSettings()
+
+    def do_GET(self):
+        settings = self.settings
+        settings.requests += 1
+
+        delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if random.random() < settings.fail_rate:
+            self.send_response(settings.fail_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        text = (query.get("q") or [""])[0]
+        target = (query.get("tl") or ["zh"])[0]
+
+        body = json.dumps({
+            "sentences": [{"trans": f"[{target}] {text}", "orig": text}],
+            "src": (query.get("sl") or ["en"])[0],
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, **settings):
+    """
+    Starts the stub on a background thread.
+    Returns (server, url), call server.shutdown() when done.
+    """
+    handler = type("Handler", (StubHandler,), {"settings": StubSettings(**settings)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, bound_port = server.server_address
+    return server, f"http://{host}:{bound_port}/translate_a/single"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub translate upstream")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency", type=int, default=0, help="base latency in ms")
+    parser.add_argument("--jitter", type=int, default=0, help="extra random latency in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="0..1 share of 503s")
+    args = parser.parse_args()
+
+    server, url = start_stub(
+        port=args.port,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        fail_rate=args.fail_rate,
+    )
+    print(f"stub translator listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
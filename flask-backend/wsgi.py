@@ -0,0 +1,14 @@
+"""
+Entry point for pre-forking servers that load the app once in the master:
+
+    APP_ENV=production gunicorn --preload -w 4 wsgi:app
+
+Workers are forked with the app already built and the lazily imported
+parts loaded, so they start serving straight away. Without --preload
+use run:app instead, each worker then builds its own app and loads the
+rest on first use.
+"""
+from app import create_app, preload
+
+app = create_app()
+preload(app)
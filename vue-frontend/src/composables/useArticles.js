@@ -7,6 +7,9 @@ export function useArticles() {
   const articles = ref([])
   const loading = ref(false)
   const error = ref('')
+  const nextCursor = ref(null)
+  const loadingMore = ref(false)
+  let lastParams = new URLSearchParams()
 
   const currentArticle = ref(null)
   const currentLoading = ref(false)
@@ -20,7 +23,7 @@ export function useArticles() {
 
     const raw = (query || '').trim()
 
-    let title = ''
+    let q = ''
     let tag = ''
 
     if (raw.toLowerCase().startsWith('tag:')) {
@@ -28,7 +31,7 @@ export function useArticles() {
     } else if (raw.startsWith('#')) {
       tag = raw.slice(1).trim()
     } else {
-      title = raw
+      q = raw
     }
 
     loading.value = true
@@ -36,42 +39,80 @@ export function useArticles() {
 
     try {
       const params = new URLSearchParams()
-      if (title) params.set('title', title)
+      if (q) params.set('q', q)
       if (tag) params.set('tag', tag)
 
-      const url =
-        params.toString().length > 0
-          ? `/api/articles/search?${params.toString()}`
-          : '/api/articles/search'
-
-      const res = await fetch(url, {
-        headers: { Authorization: `Bearer ${token.value}` },
-      })
-
-      const data = await res.json()
-      if (!res.ok) {
-        error.value = data.error || 'Failed to load articles'
+      lastParams = params
+      const data = await requestPage(params)
+      if (!data) {
         articles.value = []
+        nextCursor.value = null
         return
       }
 
-      articles.value = (data.results || []).map((a) => ({
-        id: a.id,
-        title: a.title,
-        summary: a.excerpt || '',
-        authors: a.authors || '',
-        tags: a.tags || [],
-        difficulty: a.difficulty ?? null,
-        date: a.date || null,
-      }))
+      articles.value = (data.results || []).map(toArticle)
+      nextCursor.value = data.next_cursor || null
     } catch (e) {
       error.value = 'Network error'
       articles.value = []
+      nextCursor.value = null
     } finally {
       loading.value = false
     }
   }
 
+  async function fetchMoreArticles() {
+    if (!token.value || !nextCursor.value || loadingMore.value) return
+
+    loadingMore.value = true
+    error.value = ''
+    try {
+      const params = new URLSearchParams(lastParams)
+      params.set('cursor', nextCursor.value)
+
+      const data = await requestPage(params)
+      if (!data) return
+
+      articles.value = [...articles.value, ...(data.results || []).map(toArticle)]
+      nextCursor.value = data.next_cursor || null
+    } catch (e) {
+      error.value = 'Network error'
+    } finally {
+      loadingMore.value = false
+    }
+  }
+
+  async function requestPage(params) {
+    const url =
+      params.toString().length > 0
+        ? `/api/articles/search?${params.toString()}`
+        : '/api/articles/search'
+
+    const res = await fetch(url, {
+      headers: { Authorization: `Bearer ${token.value}` },
+    })
+
+    const data = await res.json()
+    if (!res.ok) {
+      error.value = data.error || 'Failed to load articles'
+      return null
+    }
+    return data
+  }
+
+  function toArticle(a) {
+    return {
+      id: a.id,
+      title: a.title,
+      summary: a.excerpt || '',
+      highlight: a.highlight || '',
+      authors: a.authors || '',
+      tags: a.tags || [],
+      difficulty: a.difficulty ?? null,
+      date: a.date || null,
+    }
+  }
+
   async function fetchArticle(id) {
     if (!token.value) return
     currentLoading.value = true
@@ -160,7 +201,10 @@ export function useArticles() {
     articles,
     loading,
     error,
+    nextCursor,
+    loadingMore,
     fetchArticles,
+    fetchMoreArticles,
     seedArticles,
     currentArticle,
     currentLoading,
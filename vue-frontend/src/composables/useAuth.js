@@ -151,6 +151,29 @@ export function useAuth() {
     return null
   }
 
+  // user, minutes read, last reading and word count in one request
+  async function fetchBootstrap() {
+    if (!token.value) return null
+
+    const res = await fetch('/api/users/bootstrap', {
+      headers: { Authorization: `Bearer ${token.value}` },
+    })
+
+    if (res.status === 401) {
+      signOut()
+      return null
+    }
+
+    const data = await res.json().catch(() => ({}))
+    if (res.ok && data.user) {
+      localStorage.setItem('user', JSON.stringify(data.user))
+      user.value = data.user
+      return data
+    }
+
+    return null
+  }
+
   function isLoggedIn() {
     return !!token.value
   }
@@ -165,6 +188,7 @@ export function useAuth() {
     register,
     signOut,
     fetchMe,
+    fetchBootstrap,
     isLoggedIn,
   }
 
@@ -7,6 +7,9 @@ const CACHE_CAPACITY = 509
 const TTL_OK_MS = 24 * 60 * 60 * 1000
 const TTL_ERR_MS = 2 * 60 * 1000
 
+// matches TRANSLATE_BATCH_MAX on the server
+const BATCH_MAX = 200
+
 let cache = new HashTable(CACHE_CAPACITY)
 const inFlight = new Map()
 
@@ -119,5 +122,76 @@ export function useTranslations() {
     return p
   }
 
-  return { translate, loading }
+  // Many texts in one POST /api/translations/batch per BATCH_MAX instead of
+  // one GET each. Returns a Map from the trimmed text to the same result
+  // translate() gives, and fills the same cache.
+  async function translateMany(texts, opts = {}) {
+    const source = opts.source || "en"
+    const target = opts.target || "zh"
+    const results = new Map()
+
+    const pending = []
+    for (const text of texts || []) {
+      const normalized = normText(text)
+      if (!normalized || results.has(normalized) || pending.includes(normalized)) continue
+
+      if (!token.value) {
+        results.set(normalized, { ok: false, reason: "unauthorized", translation: "" })
+        continue
+      }
+      const cached = cacheGet(makeKey(normalized, source, target))
+      if (cached) results.set(normalized, { ...cached, cached: true })
+      else pending.push(normalized)
+    }
+    if (!pending.length) return results
+
+    loading.value = true
+    try {
+      for (let i = 0; i < pending.length; i += BATCH_MAX) {
+        const chunk = pending.slice(i, i + BATCH_MAX)
+        let failure = null
+        let data = {}
+
+        try {
+          const res = await fetch("/api/translations/batch", {
+            method: "POST",
+            headers: {
+              "Content-Type": "application/json",
+              Authorization: `Bearer ${token.value}`,
+            },
+            body: JSON.stringify({ texts: chunk, source, target }),
+          })
+          data = await res.json().catch(() => ({}))
+          if (!res.ok) failure = res.status === 401 ? "unauthorized" : "error"
+        } catch {
+          failure = "network"
+        }
+
+        for (const text of chunk) {
+          let result
+          if (failure) {
+            result = { ok: false, reason: failure, translation: "" }
+          } else {
+            const item = (data.results || {})[text] || {}
+            const translation = (item.translation || "").trim()
+            const ok = !!translation
+            result = {
+              ok,
+              reason: ok ? "ok" : item.status === "error" ? "error" : "no_translation",
+              translation,
+              source_lang: data.source_lang || source,
+              target_lang: data.target_lang || target,
+            }
+          }
+          cacheSet(makeKey(text, source, target), result, result.ok ? TTL_OK_MS : TTL_ERR_MS)
+          results.set(text, result)
+        }
+      }
+    } finally {
+      loading.value = false
+    }
+    return results
+  }
+
+  return { translate, translateMany, loading }
 }
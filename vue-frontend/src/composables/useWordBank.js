@@ -3,33 +3,41 @@ import { useAuth } from "@/composables/useAuth"
 import { useDictionary } from "@/composables/useDictionary"
 import { useTranslations } from "@/composables/useTranslations"
 
+const PAGE_SIZE = 200
+
 export function useWordBank() {
   const { token } = useAuth()
   const { lookup } = useDictionary()
-  const { translate } = useTranslations()
+  const { translate, translateMany } = useTranslations()
 
   const words = ref([])
   const loading = ref(false)
   const error = ref("")
+  const nextCursor = ref(null)
 
-  async function fetchWords() {
+  async function fetchWords({ more = false } = {}) {
     if (!token.value) {
       words.value = []
+      nextCursor.value = null
       return
     }
+    if (more && !nextCursor.value) return
 
     loading.value = true
     error.value = ""
 
     try {
-      const res = await fetch("/api/words", {
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+      if (more) params.set("cursor", nextCursor.value)
+
+      const res = await fetch(`/api/words?${params.toString()}`, {
         headers: { Authorization: `Bearer ${token.value}` },
       })
       const data = await res.json().catch(() => ({}))
 
       if (!res.ok) {
         error.value = data.error || "Failed to load words"
-        words.value = []
+        if (!more) words.value = []
         return
       }
 
@@ -41,24 +49,33 @@ export function useWordBank() {
         entryError: "",
       }))
 
-      await Promise.all(
-        rows.map(async (row) => {
-          if (!row.translation && row.word) {
-            const r = await translate(row.word, { source: "en", target: "zh" })
-            if (r.ok) row.translation = r.translation
-          }
-        })
-      )
+      // one batch request for the page's untranslated words, not one per word
+      const untranslated = rows.filter((row) => !row.translation && row.word)
+      if (untranslated.length) {
+        const translated = await translateMany(
+          untranslated.map((row) => row.word),
+          { source: "en", target: "zh" }
+        )
+        for (const row of untranslated) {
+          const r = translated.get(row.word.trim())
+          if (r?.ok) row.translation = r.translation
+        }
+      }
 
-      words.value = rows
+      words.value = more ? [...words.value, ...rows] : rows
+      nextCursor.value = data.next_cursor || null
     } catch {
       error.value = "Network error"
-      words.value = []
+      if (!more) words.value = []
     } finally {
       loading.value = false
     }
   }
 
+  function fetchMoreWords() {
+    return fetchWords({ more: true })
+  }
+
   async function addWord(word) {
     if (!token.value) return { ok: false, reason: "unauthorized" }
 
@@ -139,7 +156,9 @@ export function useWordBank() {
     words,
     loading,
     error,
+    nextCursor,
     fetchWords,
+    fetchMoreWords,
     addWord,
     clearWords,
     deleteWord,